@@ -1,24 +1,42 @@
 from langchain.chat_models import init_chat_model
 from langchain.agents import create_agent
-from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.constants import TAG_NOSTREAM
 
+from app.checkpointers import build_checkpointer, checkpoint_durability
 from app.prompts.system_prompt import SYSTEM_PROMPT
 from app.prompts.tool_selector_prompt import TOOL_SELECTOR_PROMPT
-from app.tools.external.weather import get_weather_forecast
-from app.middleware import retry_model, retry_tool, hallucination_guardrail, ToolSelectorMiddleware
+from app.tools.external.weather import get_weather_forecast, get_weather_forecasts
+from app.middleware import (
+    retry_model,
+    retry_tool,
+    hallucination_guardrail,
+    ToolSelectorMiddleware,
+    HistoryWindowMiddleware,
+)
+
+MODEL_NAME = "google_genai:gemini-3-flash-preview"
 
-model = init_chat_model("google_genai:gemini-3-flash-preview")
-checkpointer = InMemorySaver()
-tools = [get_weather_forecast]
+model = init_chat_model(MODEL_NAME)
+checkpointer = build_checkpointer()
+durability = checkpoint_durability()
+tools = [get_weather_forecast, get_weather_forecasts]
 
+# The selector gets its own (identical) model instance tagged "nostream" so its
+# structured output never leaks into the token stream of /completions.
 tool_selector = ToolSelectorMiddleware(
+    model=init_chat_model(MODEL_NAME, tags=[TAG_NOSTREAM]),
     system_prompt=TOOL_SELECTOR_PROMPT,
 )
 
+# Outermost, so every later middleware and the model only see the window.
+history_window = HistoryWindowMiddleware(
+    summary_model=init_chat_model(MODEL_NAME, tags=[TAG_NOSTREAM]),
+)
+
 agent = create_agent(
     model=model,
     tools=tools,
     system_prompt=SYSTEM_PROMPT,
     checkpointer=checkpointer,
-    middleware=[tool_selector, retry_model, retry_tool, hallucination_guardrail],
+    middleware=[history_window, tool_selector, retry_model, retry_tool, hallucination_guardrail],
 )
@@ -0,0 +1,81 @@
+import os
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.checkpointers.bounded import BoundedInMemorySaver
+from app.checkpointers.sqlite import SqliteCheckpointSaver
+
+CHECKPOINTER_BACKENDS = ("memory", "bounded", "sqlite")
+CHECKPOINT_DURABILITIES = ("exit", "async", "sync")
+
+
+def _env_number(name: str, default, cast):
+    """Read a numeric env var; an empty string or "none" disables the limit."""
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    if raw.strip().lower() in ("", "none"):
+        return None
+    return cast(raw)
+
+
+def build_checkpointer(backend: str | None = None) -> BaseCheckpointSaver:
+    """Build the conversation checkpointer selected by ``CHECKPOINTER_BACKEND``.
+
+    Backends:
+    - ``bounded`` (default): `BoundedInMemorySaver`, limited by
+      ``CHECKPOINTER_MAX_THREADS``, ``CHECKPOINTER_TTL_SECONDS`` and
+      ``CHECKPOINTER_MAX_BYTES``, with delta-encoded message lists.
+    - ``memory``: LangGraph's unbounded ``InMemorySaver``.
+    - ``sqlite``: `SqliteCheckpointSaver` at ``CHECKPOINTER_SQLITE_PATH``, shared
+      by every worker on the node (run uvicorn with ``--workers N``).
+
+    ``CHECKPOINTER_KEEP_LAST`` (default 2, ``none`` to keep everything) sets how
+    many checkpoints per thread the ``bounded`` and ``sqlite`` backends retain.
+    """
+    keep_last = _env_number("CHECKPOINTER_KEEP_LAST", 2, int)
+    backend = (backend or os.environ.get("CHECKPOINTER_BACKEND", "bounded")).strip().lower()
+    if backend == "memory":
+        return InMemorySaver()
+    if backend == "bounded":
+        return BoundedInMemorySaver(
+            max_threads=_env_number("CHECKPOINTER_MAX_THREADS", 1000, int) or 1000,
+            ttl_seconds=_env_number("CHECKPOINTER_TTL_SECONDS", 6 * 3600, float),
+            max_bytes=_env_number("CHECKPOINTER_MAX_BYTES", 256 * 1024 * 1024, int),
+            keep_last=keep_last,
+        )
+    if backend == "sqlite":
+        return SqliteCheckpointSaver(
+            os.environ.get("CHECKPOINTER_SQLITE_PATH", ".data/checkpoints.sqlite3"),
+            hot_cache_size=_env_number("CHECKPOINTER_HOT_CACHE_SIZE", 256, int) or 0,
+            keep_last=keep_last,
+        )
+    raise ValueError(
+        f"Unknown CHECKPOINTER_BACKEND {backend!r}; expected one of {', '.join(CHECKPOINTER_BACKENDS)}"
+    )
+
+
+def checkpoint_durability() -> str:
+    """LangGraph ``durability`` mode for agent runs, from ``CHECKPOINT_DURABILITY``.
+
+    The default, ``exit``, persists one checkpoint when the run finishes instead
+    of one per super-step, so a whole turn (tool selection, model, tool, model,
+    guardrail) costs a single checkpoint write.
+    """
+    durability = os.environ.get("CHECKPOINT_DURABILITY", "exit").strip().lower()
+    if durability not in CHECKPOINT_DURABILITIES:
+        raise ValueError(
+            f"Unknown CHECKPOINT_DURABILITY {durability!r}; expected one of {', '.join(CHECKPOINT_DURABILITIES)}"
+        )
+    return durability
+
+
+__all__ = [
+    "BoundedInMemorySaver",
+    "SqliteCheckpointSaver",
+    "build_checkpointer",
+    "checkpoint_durability",
+    "CHECKPOINTER_BACKENDS",
+    "CHECKPOINT_DURABILITIES",
+]
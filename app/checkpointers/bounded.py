@@ -0,0 +1,368 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """In-memory checkpointer that evicts whole threads to keep memory bounded.
+
+    Threads are tracked in LRU order (any read or write touches a thread) and
+    evicted when:
+
+    - they have not been touched for ``ttl_seconds``,
+    - more than ``max_threads`` threads are held, or
+    - the serialized size of all held checkpoints, blobs and pending writes
+      exceeds ``max_bytes``.
+
+    The thread being written is never evicted by its own write, so a single
+    oversized conversation degrades to "one thread held" rather than data loss
+    mid-turn.  Sizes are measured on the serialized bytes the saver actually
+    stores, which is a close proxy for (but not exactly) the RSS it accounts for.
+
+    Compaction keeps per-thread memory linear in the number of messages:
+
+    - ``keep_last``: only the newest N checkpoints of each thread (and their
+      pending writes) are kept; older ones are dropped on every ``put``.
+    - ``delta_channels``: list channels (``messages``) whose new value extends
+      the previous one are stored as just the appended suffix plus a reference
+      to the previous version, so consecutive checkpoints share the prefix
+      instead of each holding a full copy.  A chain is re-based onto a full
+      blob every ``max_delta_chain`` links and after compaction drops the
+      checkpoint that held its full blob, so a read never walks back further
+      than that, however long the thread.
+
+    Every key a thread owns is indexed per thread, so evicting or deleting a
+    thread costs the size of that thread, not of the whole saver.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = 1000,
+        ttl_seconds: float | None = 6 * 3600,
+        max_bytes: int | None = 256 * 1024 * 1024,
+        keep_last: int | None = 2,
+        delta_channels: tuple[str, ...] = ("messages",),
+        max_delta_chain: int = 8,
+        serde=None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.keep_last = keep_last
+        self.delta_channels = frozenset(delta_channels)
+        self.max_delta_chain = max_delta_chain
+        self._lock = threading.RLock()
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        self._thread_checkpoints: dict[str, int] = {}
+        self._total_bytes = 0
+        self._evictions = 0
+        # Compaction bookkeeping, all keyed under (thread_id, checkpoint_ns[, ...]).
+        self._deltas: dict[tuple, Any] = {}  # blob key -> base version of a suffix-only blob
+        # (thread, ns, channel) -> (version, fingerprint, links to the full blob, full blob's version)
+        self._last_lists: dict[tuple, tuple[Any, list, int, Any]] = {}
+        self._checkpoint_versions: dict[tuple, dict] = {}  # (thread, ns, checkpoint_id) -> channel_versions
+        self._thread_blobs: dict[tuple, set[tuple]] = {}  # (thread, ns) -> blob keys
+        # thread -> every key it owns in storage-side dicts (blobs, writes) and the indexes above.
+        self._thread_keys: dict[str, set[tuple]] = {}
+
+    # ── BaseCheckpointSaver API ──────────────────────────────────────────────
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = str(config["configurable"]["thread_id"])
+        with self._lock:
+            self._expire()
+            result = super().get_tuple(config)
+            if thread_id in self._last_access:
+                self._last_access[thread_id] = time.monotonic()
+                self._last_access.move_to_end(thread_id)
+            elif result is None:
+                # InMemorySaver's defaultdicts create empty entries on lookup;
+                # drop them so unknown threads do not accumulate.
+                self.storage.pop(thread_id, None)
+            return result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # Mirrors InMemorySaver.put, but encodes delta channels and compacts.
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            c = checkpoint.copy()
+            values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+            blob_keys = self._thread_blobs.setdefault((thread_id, checkpoint_ns), set())
+            owned = self._thread_keys.setdefault(thread_id, set())
+            owned.add((thread_id, checkpoint_ns))
+            added = 0
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                if channel not in values:
+                    blob = ("empty", b"")
+                elif channel in self.delta_channels:
+                    blob = self._encode_delta(key, values[channel])
+                else:
+                    blob = self.serde.dumps_typed(values[channel])
+                self.blobs[key] = blob
+                blob_keys.add(key)
+                owned.add(key)
+                added += len(blob[1])
+
+            saved = (
+                self.serde.dumps_typed(c),
+                self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+                config["configurable"].get("checkpoint_id"),  # parent
+            )
+            self.storage[thread_id][checkpoint_ns][checkpoint["id"]] = saved
+            self._checkpoint_versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(c["channel_versions"])
+            owned.add((thread_id, checkpoint_ns, checkpoint["id"]))
+            added += len(saved[0][1]) + len(saved[1][1])
+
+            self._thread_checkpoints[thread_id] = self._thread_checkpoints.get(thread_id, 0) + 1
+            self._account(thread_id, added)
+            if self.keep_last:
+                self._compact(thread_id, checkpoint_ns)
+            self._enforce_limits(protect=thread_id)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: list[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = self._writes_bytes(key)
+            super().put_writes(config, writes, task_id, task_path)
+            self._thread_keys.setdefault(thread_id, set()).add(key)
+            self._account(thread_id, self._writes_bytes(key) - before)
+            self._enforce_limits(protect=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._forget(str(thread_id))
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        channel_values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            key = (thread_id, checkpoint_ns, channel, version)
+            if key not in self.blobs:
+                continue
+            if key in self._deltas:
+                channel_values[channel] = self._decode_delta(key)
+            elif self.blobs[key][0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(self.blobs[key])
+        return channel_values
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of what the saver currently holds."""
+        with self._lock:
+            return {
+                "backend": "bounded",
+                "threads": len(self._last_access),
+                "checkpoints": sum(self._thread_checkpoints.values()),
+                "bytes": self._total_bytes,
+                "delta_blobs": len(self._deltas),
+                "evictions": self._evictions,
+                "max_threads": self.max_threads,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "keep_last": self.keep_last,
+            }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _writes_bytes(self, key: tuple[str, str, str]) -> int:
+        return sum(len(value[2][1]) for value in self.writes.get(key, {}).values())
+
+    def _account(self, thread_id: str, added: int) -> None:
+        self._thread_bytes[thread_id] = self._thread_bytes.get(thread_id, 0) + added
+        self._total_bytes += added
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _forget(self, thread_id: str) -> None:
+        """Drop everything held for *thread_id*, touching only the keys indexed for it."""
+        self.storage.pop(thread_id, None)
+        for key in self._thread_keys.pop(thread_id, ()):
+            for index in (self.blobs, self.writes, self._deltas, self._last_lists, self._checkpoint_versions, self._thread_blobs):
+                index.pop(key, None)
+        self._last_access.pop(thread_id, None)
+        self._thread_checkpoints.pop(thread_id, None)
+        self._total_bytes -= self._thread_bytes.pop(thread_id, 0)
+
+    @staticmethod
+    def _fingerprint(value: Any) -> list | None:
+        """Cheap identity of a message list, one entry per message, or None if not applicable.
+
+        Covers the id, type and every field a later message may differ in
+        while keeping its content (an AIMessage's ``tool_calls``, a
+        ToolMessage's ``tool_call_id``), so a suffix is only stored when the
+        prefix really is unchanged.
+        """
+        if not isinstance(value, list):
+            return None
+        fingerprint = []
+        for item in value:
+            item_id = getattr(item, "id", None)
+            if item_id is None:
+                return None
+            fields = (
+                type(item).__name__,
+                str(getattr(item, "content", "")),
+                str(getattr(item, "tool_calls", None)),
+                getattr(item, "tool_call_id", None),
+                getattr(item, "name", None),
+            )
+            fingerprint.append((item_id, hash(fields)))
+        return fingerprint
+
+    def _encode_delta(self, key: tuple, value: Any) -> tuple[str, bytes]:
+        """Serialize *value*, storing only the new suffix when it extends the previous version."""
+        thread_id, checkpoint_ns, channel, version = key
+        list_key = (thread_id, checkpoint_ns, channel)
+        fingerprint = self._fingerprint(value)
+        previous = self._last_lists.get(list_key)
+        if fingerprint is None:
+            self._last_lists.pop(list_key, None)
+            return self.serde.dumps_typed(value)
+
+        self._thread_keys.setdefault(thread_id, set()).add(list_key)
+        if previous is not None:
+            base_version, base_fingerprint, links, head_version = previous
+            base_key = (thread_id, checkpoint_ns, channel, base_version)
+            n = len(base_fingerprint)
+            if links < self.max_delta_chain and base_key in self.blobs and fingerprint[:n] == base_fingerprint:
+                self._deltas[key] = base_version
+                self._last_lists[list_key] = (version, fingerprint, links + 1, head_version)
+                return self.serde.dumps_typed(value[n:])
+        self._last_lists[list_key] = (version, fingerprint, 0, version)
+        return self.serde.dumps_typed(value)
+
+    def _decode_delta(self, key: tuple) -> list:
+        """Rebuild a delta-encoded list by walking back to its full base blob."""
+        thread_id, checkpoint_ns, channel, _ = key
+        chain = [key]
+        while chain[-1] in self._deltas:
+            chain.append((thread_id, checkpoint_ns, channel, self._deltas[chain[-1]]))
+        value = list(self.serde.loads_typed(self.blobs[chain[-1]]))
+        for link in reversed(chain[:-1]):
+            value.extend(self.serde.loads_typed(self.blobs[link]))
+        return value
+
+    def _compact(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the newest ``keep_last`` checkpoints and any blobs only they used."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_last:
+            return
+
+        removed = 0
+        for checkpoint_id in sorted(checkpoints)[: -self.keep_last]:
+            saved_checkpoint, saved_metadata, _parent = checkpoints.pop(checkpoint_id)
+            removed += len(saved_checkpoint[1]) + len(saved_metadata[1])
+            self._checkpoint_versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._thread_keys.get(thread_id, set()).discard((thread_id, checkpoint_ns, checkpoint_id))
+            for value in self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                removed += len(value[2][1])
+            self._thread_checkpoints[thread_id] -= 1
+
+        live: set[tuple] = set()
+        for checkpoint_id in checkpoints:
+            for channel, version in self._checkpoint_versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                # Keep the whole delta chain the live version is built from.
+                while key not in live:
+                    live.add(key)
+                    if key not in self._deltas:
+                        break
+                    key = (thread_id, checkpoint_ns, channel, self._deltas[key])
+
+        # A chain whose full blob no longer belongs to a live checkpoint only
+        # survives for the deltas built on it; start the next write from a full
+        # blob so the old chain can go with the checkpoints that use it.
+        referenced = {
+            (channel, version)
+            for checkpoint_id in checkpoints
+            for channel, version in self._checkpoint_versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items()
+        }
+        for channel in self.delta_channels:
+            list_key = (thread_id, checkpoint_ns, channel)
+            last = self._last_lists.get(list_key)
+            if last is not None and (channel, last[3]) not in referenced:
+                del self._last_lists[list_key]
+
+        owned = self._thread_keys.get(thread_id, set())
+        blob_keys = self._thread_blobs.get((thread_id, checkpoint_ns), set())
+        for key in blob_keys - live:
+            blob = self.blobs.pop(key, None)
+            if blob is not None:
+                removed += len(blob[1])
+            self._deltas.pop(key, None)
+            owned.discard(key)
+        blob_keys &= live
+        self._account(thread_id, -removed)
+
+    def _evict(self, thread_id: str, reason: str) -> None:
+        logger.info(
+            "Evicting checkpoint thread %s (%s, %d bytes)",
+            thread_id, reason, self._thread_bytes.get(thread_id, 0),
+        )
+        self._forget(thread_id)
+        self._evictions += 1
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if last_access >= cutoff:
+                break
+            self._evict(thread_id, "ttl")
+
+    def _enforce_limits(self, protect: str) -> None:
+        self._expire()
+        while len(self._last_access) > self.max_threads or (
+            self.max_bytes is not None and self._total_bytes > self.max_bytes
+        ):
+            victim = next((t for t in self._last_access if t != protect), None)
+            if victim is None:
+                break
+            reason = "max_threads" if len(self._last_access) > self.max_threads else "max_bytes"
+            self._evict(victim, reason)
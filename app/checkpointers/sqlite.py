@@ -0,0 +1,410 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+-- One row per thread pointing at its latest checkpoint.  `seq` is bumped on
+-- every write so workers can tell whether their hot cache is still current.
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns)
+);
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """Durable checkpointer backed by a local SQLite database in WAL mode.
+
+    Every uvicorn worker on the node opens the same file, so a follow-up that
+    lands on a different worker still sees the whole conversation.
+
+    - Each ``put`` / ``put_writes`` call is one ``BEGIN IMMEDIATE`` transaction
+      (checkpoint row, thread head and all writes together).  Combined with
+      ``durability="exit"`` (see `checkpoint_durability`) a whole turn is
+      coalesced into a single checkpoint write.
+    - The latest checkpoint of recently used threads is kept in a small
+      in-process LRU.  A lookup only reads the thread's ``seq`` by primary key
+      and skips loading the checkpoint blob when the cached copy is current.
+    - ``keep_last`` compacts each thread to its newest N checkpoints (and their
+      writes) inside the same transaction as the ``put``, so the database grows
+      with the length of conversations, not with the number of turns.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        hot_cache_size: int = 256,
+        keep_last: int | None = 2,
+        busy_timeout_ms: int = 5000,
+        serde=None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = path
+        self.hot_cache_size = hot_cache_size
+        self.keep_last = keep_last
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        # (thread_id, checkpoint_ns) -> (seq, checkpoint row, write rows)
+        self._hot: OrderedDict[tuple[str, str], tuple[int, tuple, list[tuple]]] = OrderedDict()
+        self._hot_hits = 0
+        self._hot_misses = 0
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+                if row is None:
+                    return None
+                writes = self._load_writes(thread_id, checkpoint_ns, checkpoint_id)
+                return self._to_tuple(thread_id, checkpoint_ns, row, writes)
+
+            head = self._conn.execute(
+                "SELECT checkpoint_id, seq FROM threads WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if head is None:
+                return None
+
+            key = (thread_id, checkpoint_ns)
+            cached = self._hot.get(key)
+            if cached is not None and cached[0] == head[1] and cached[1][0] == head[0]:
+                self._hot.move_to_end(key)
+                self._hot_hits += 1
+                _, row, writes = cached
+            else:
+                self._hot_misses += 1
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, head[0]),
+                ).fetchone()
+                if row is None:
+                    return None
+                writes = self._load_writes(thread_id, checkpoint_ns, head[0])
+                self._remember(key, head[1], row, writes)
+        return self._to_tuple(thread_id, checkpoint_ns, row, writes)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        yielded = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and yielded >= limit:
+                return
+            checkpoint_tuple = self._to_tuple(
+                thread_id, checkpoint_ns, row, self._load_writes(thread_id, checkpoint_ns, row[0]),
+            )
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            yielded += 1
+            yield checkpoint_tuple
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, payload = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_payload = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                    type_, payload, metadata_type, metadata_payload,
+                ),
+            )
+            self._bump_head(conn, thread_id, checkpoint_ns, checkpoint["id"])
+            if self.keep_last:
+                self._compact(conn, thread_id, checkpoint_ns)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts, ...) overwrite; regular writes are idempotent.
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, payload = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                channel, type_, payload, task_path,
+            ))
+
+        with self._transaction() as conn:
+            conn.executemany(
+                f"{verb} INTO writes "
+                "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "UPDATE threads SET seq = seq + 1 WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        thread_id = str(thread_id)
+        with self._transaction() as conn:
+            for table in ("checkpoints", "writes", "threads"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            for key in [k for k in self._hot if k[0] == thread_id]:
+                del self._hot[key]
+
+    # ── Async API (SQLite calls are short; run them off the event loop) ─────
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ── Metrics ──────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of what the database holds plus hot-cache effectiveness."""
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(DISTINCT thread_id) FROM threads").fetchone()[0]
+            checkpoints, checkpoint_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length(checkpoint) + length(metadata)), 0) FROM checkpoints"
+            ).fetchone()
+            write_bytes = self._conn.execute("SELECT COALESCE(SUM(length(value)), 0) FROM writes").fetchone()[0]
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "threads": threads,
+                "checkpoints": checkpoints,
+                "bytes": checkpoint_bytes + write_bytes,
+                "hot_cache_size": len(self._hot),
+                "hot_cache_hits": self._hot_hits,
+                "hot_cache_misses": self._hot_misses,
+                "keep_last": self.keep_last,
+            }
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _bump_head(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> None:
+        conn.execute(
+            "INSERT INTO threads (thread_id, checkpoint_ns, checkpoint_id, seq) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (thread_id, checkpoint_ns) DO UPDATE SET "
+            "checkpoint_id = max(threads.checkpoint_id, excluded.checkpoint_id), seq = threads.seq + 1",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def _compact(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str) -> None:
+        keep = (
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        params = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last)
+        for table in ("checkpoints", "writes"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})",
+                params,
+            )
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT task_id, channel, type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+    def _remember(self, key: tuple[str, str], seq: int, row: tuple, writes: list[tuple]) -> None:
+        if self.hot_cache_size <= 0:
+            return
+        self._hot[key] = (seq, row, writes)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_cache_size:
+            self._hot.popitem(last=False)
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence, writes: list[tuple]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, payload, metadata_type, metadata_payload = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, payload)),
+            metadata=self.serde.loads_typed((metadata_type, metadata_payload)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, channel, type_, value in writes
+            ],
+        )
@@ -1,13 +1,19 @@
+import asyncio
+import json
 import logging
 import time
 import uuid
 from contextlib import asynccontextmanager
+from typing import Literal
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import AIMessage, ToolMessage
+from pydantic import BaseModel, Field
 
-from app.middleware.event_collector import reset_events, get_events
+from app.middleware.event_collector import reset_events, get_events, set_event_listener
+from app.middleware.hallucination_guardrail import set_grounding_mode
+from app.middleware.retry import set_tool_parallelism
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,12 +21,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "gemini-3-flash-preview"
+ERROR_MESSAGE = "Something went wrong. Please try again later."
+
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
+    from app.middleware import hallucination_guardrail
+    from app.tools.external import http_client
+    from app.tools.external.warmer import warmer
+
     logger.info("Travel Assistant service started")
+    warmer.start()
+    # Runs in the background so a slow verifier does not hold up startup.
+    prewarm = asyncio.create_task(hallucination_guardrail.aprewarm())
     yield
     logger.info("Travel Assistant service shutting down")
+    prewarm.cancel()
+    await warmer.stop()
+    await http_client.aclose()
 
 
 app = FastAPI(title="Travel Assistant", lifespan=lifespan)
@@ -41,9 +60,42 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    from app.agent import checkpointer
+    from app.middleware import hallucination_guardrail
+    from app.tools.external.weather import (
+        forecast_cache,
+        forecast_flight,
+        gazetteer,
+        geocode_cache,
+        geocode_flight,
+        nominatim_limiter,
+    )
+    from app.tools.external.warmer import warmer
+
+    stats = getattr(checkpointer, "stats", None)
+    return {
+        "checkpointer": stats() if stats else {"backend": type(checkpointer).__name__},
+        "forecast_cache": forecast_cache.stats(),
+        "geocode_cache": geocode_cache.stats(),
+        "gazetteer": gazetteer.stats(),
+        "nominatim_rate_limit": nominatim_limiter.stats(),
+        "singleflight": {"geocode": geocode_flight.stats(), "forecast": forecast_flight.stats()},
+        "warmer": warmer.stats(),
+        "grounding_check": hallucination_guardrail.stats(),
+    }
+
+
 class CompletionRequest(BaseModel):
     thread_id: str
     input: str
+    stream: bool = False
+    # Max tool calls run concurrently for this request (default: MAX_PARALLEL_TOOLS env).
+    max_parallel_tools: int | None = Field(None, ge=1, le=16)
+    # "speculative" streams the final response while it is verified (default: GROUNDING_MODE env).
+    # Non-streaming requests are always verified before they return.
+    grounding_mode: Literal["blocking", "speculative"] | None = None
 
 
 def _extract_text(content) -> str:
@@ -61,10 +113,36 @@ def _extract_text(content) -> str:
     return str(content)
 
 
+def _order_tool_results(messages) -> list:
+    """Order each run of ToolMessages like the tool_calls of the AIMessage that issued them.
+
+    Parallel tool calls finish in any order; the debug trace should not.
+    """
+    ordered = []
+    position: dict[str, int] = {}
+    run: list = []
+
+    def flush():
+        run.sort(key=lambda m: position.get(getattr(m, "tool_call_id", None), len(position)))
+        ordered.extend(run)
+        run.clear()
+
+    for msg in messages:
+        if isinstance(msg, ToolMessage):
+            run.append(msg)
+            continue
+        flush()
+        ordered.append(msg)
+        if getattr(msg, "tool_calls", None):
+            position = {tc.get("id"): i for i, tc in enumerate(msg.tool_calls)}
+    flush()
+    return ordered
+
+
 def _serialize_messages(messages) -> list[dict]:
     """Build a chronological debug trace from LangGraph messages."""
     trace = []
-    for msg in messages:
+    for msg in _order_tool_results(messages):
         text = _extract_text(msg.content)
         entry = {"type": type(msg).__name__, "content": text}
 
@@ -85,31 +163,183 @@ def _serialize_messages(messages) -> list[dict]:
     return trace
 
 
+def _sse(data, event: str | None = None) -> str:
+    """Format one Server-Sent Event."""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+def _completion_chunk(completion_id: str, created: int, thread_id: str, delta: dict, finish_reason=None) -> dict:
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": MODEL_NAME,
+        "thread_id": thread_id,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+async def _stream_completion(req: CompletionRequest):
+    """Run the agent with ``astream`` and relay it as OpenAI-style SSE chunks.
+
+    Besides the standard ``data:`` chunks, named events carry extras that
+    OpenAI clients ignore:
+
+    - ``middleware``: a middleware event, sent as soon as it is emitted.
+    - ``step``: debug trace entries for each node update (tool calls/results).
+    - ``retract``: discard the assistant text streamed so far (the model turned
+      it into a tool call, or the grounding check rejected it).  In
+      speculative grounding mode this can follow the ``finish_reason: "stop"``
+      chunk; the regenerated response then streams as a new message.
+    - ``debug``: the full debug trace and middleware events, sent at the end.
+    - ``error``: the agent failed; the stream ends after it.
+    """
+    from app.agent import agent, durability
+    from app.middleware import hallucination_guardrail
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    config = {"configurable": {"thread_id": req.thread_id}}
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    reset_events()
+    set_tool_parallelism(req.max_parallel_tools)
+    speculative = set_grounding_mode(req.grounding_mode)
+    # Events may be emitted from executor threads, so hop back onto the loop.
+    set_event_listener(lambda event: loop.call_soon_threadsafe(queue.put_nowait, ("middleware", event)))
+
+    async def _produce():
+        agent_input = {"messages": [{"role": "user", "content": req.input}]}
+        try:
+            while agent_input is not None:
+                async for mode, payload in agent.astream(
+                    agent_input,
+                    config=config,
+                    stream_mode=["messages", "updates"],
+                    durability=durability,
+                ):
+                    await queue.put((mode, payload))
+                agent_input = None
+                if speculative is not None and speculative.pending:
+                    # The response is complete; finish it for the client, then settle the
+                    # verdict and, on failure, regenerate in a second run.
+                    await queue.put(("delivered", None))
+                    agent_input = await hallucination_guardrail.aresolve(speculative)
+        except Exception:
+            logger.exception("Agent streaming failed for thread_id=%s", req.thread_id)
+            await queue.put(("error", None))
+        finally:
+            await queue.put(("end", None))
+
+    logger.info("Streaming agent for thread_id=%s", req.thread_id)
+    producer = asyncio.create_task(_produce())
+    streamed_text = False
+    finished = False
+    tool_calling_ids: set[str] = set()
+    failed = False
+    try:
+        yield _sse(_completion_chunk(completion_id, created, req.thread_id, {"role": "assistant", "content": ""}))
+        while True:
+            kind, payload = await queue.get()
+            if kind == "end":
+                break
+            if kind == "error":
+                failed = True
+                continue
+            if kind == "delivered":
+                finished = True
+                yield _sse(_completion_chunk(completion_id, created, req.thread_id, {}, finish_reason="stop"))
+                continue
+
+            if kind == "middleware":
+                yield _sse(payload, event="middleware")
+                if payload["middleware"] == "hallucination_guardrail" and payload["status"] == "failed" and streamed_text:
+                    streamed_text = False
+                    yield _sse({"reason": "grounding_check_failed"}, event="retract")
+                continue
+
+            if kind == "updates":
+                for node, update in payload.items():
+                    if isinstance(update, dict) and update.get("messages"):
+                        yield _sse({"node": node, "steps": _serialize_messages(update["messages"])}, event="step")
+                continue
+
+            # kind == "messages": only relay tokens produced by the main model node.
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") != "model" or not isinstance(chunk, AIMessage):
+                continue
+            if getattr(chunk, "tool_call_chunks", None) or chunk.tool_calls:
+                if chunk.id:
+                    tool_calling_ids.add(chunk.id)
+                if streamed_text:
+                    streamed_text = False
+                    yield _sse({"reason": "tool_call"}, event="retract")
+                continue
+            if chunk.id and chunk.id in tool_calling_ids:
+                continue
+            text = _extract_text(chunk.content)
+            if text:
+                streamed_text = True
+                finished = False
+                yield _sse(_completion_chunk(completion_id, created, req.thread_id, {"content": text}))
+
+        if failed:
+            yield _sse({"error": ERROR_MESSAGE}, event="error")
+        else:
+            state = await agent.aget_state(config)
+            if not finished:
+                yield _sse(_completion_chunk(completion_id, created, req.thread_id, {}, finish_reason="stop"))
+            yield _sse(
+                {"debug": _serialize_messages(state.values.get("messages", [])), "middleware_events": get_events()},
+                event="debug",
+            )
+        yield _sse("[DONE]")
+    finally:
+        set_event_listener(None)
+        if not producer.done():
+            producer.cancel()
+        if speculative is not None:
+            speculative.cancel()
+
+
 @app.post("/completions")
 async def completions(req: CompletionRequest):
-    from app.agent import agent
+    if req.stream:
+        return StreamingResponse(
+            _stream_completion(req),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    from app.agent import agent, durability
 
     logger.info("Invoking agent for thread_id=%s", req.thread_id)
     reset_events()
+    set_tool_parallelism(req.max_parallel_tools)
     try:
         config = {"configurable": {"thread_id": req.thread_id}}
-        result = agent.invoke(
+        result = await agent.ainvoke(
             {"messages": [{"role": "user", "content": req.input}]},
             config=config,
+            durability=durability,
         )
         last_message = result["messages"][-1]
     except Exception:
         logger.exception("Agent invocation failed for thread_id=%s", req.thread_id)
         return JSONResponse(
             status_code=500,
-            content={"error": "Something went wrong. Please try again later."},
+            content={"error": ERROR_MESSAGE},
         )
 
     return {
         "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
         "object": "chat.completion",
         "created": int(time.time()),
-        "model": "gemini-3-flash-preview",
+        "model": MODEL_NAME,
         "thread_id": req.thread_id,
         "choices": [
             {
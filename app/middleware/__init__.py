@@ -1,5 +1,6 @@
 from app.middleware.retry import retry_model, retry_tool
 from app.middleware.hallucination_guardrail import hallucination_guardrail
 from app.middleware.tool_selector import ToolSelectorMiddleware
+from app.middleware.history_window import HistoryWindowMiddleware
 
-__all__ = ["retry_model", "retry_tool", "hallucination_guardrail", "ToolSelectorMiddleware"]
+__all__ = ["retry_model", "retry_tool", "hallucination_guardrail", "ToolSelectorMiddleware", "HistoryWindowMiddleware"]
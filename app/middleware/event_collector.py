@@ -3,24 +3,43 @@
 Usage:
     # In the request handler (main.py):
     reset_events()
-    agent.invoke(...)
+    await agent.ainvoke(...)
     events = get_events()
 
     # In middleware:
     emit_event(middleware="retry_model", status="retried", message="...", details={...})
+
+    # Streaming handlers can also observe events as they happen:
+    set_event_listener(lambda event: ...)
 """
 
 import contextvars
-from typing import Any
+import logging
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
 
 _events: contextvars.ContextVar[list[dict[str, Any]]] = contextvars.ContextVar(
     "middleware_events", default=[]
 )
+_listener: contextvars.ContextVar[Callable[[dict[str, Any]], None] | None] = contextvars.ContextVar(
+    "middleware_event_listener", default=None
+)
 
 
 def reset_events() -> None:
-    """Clear the event list for a new request."""
+    """Clear the event list (and any listener) for a new request."""
     _events.set([])
+    _listener.set(None)
+
+
+def set_event_listener(listener: Callable[[dict[str, Any]], None] | None) -> None:
+    """Register a callback invoked with each event as it is emitted in the current request.
+
+    The callback may be called from worker threads, so it must be thread-safe
+    (e.g. ``loop.call_soon_threadsafe(queue.put_nowait, event)``).
+    """
+    _listener.set(listener)
 
 
 def emit_event(*, middleware: str, status: str, message: str, details: dict[str, Any] | None = None) -> None:
@@ -29,6 +48,12 @@ def emit_event(*, middleware: str, status: str, message: str, details: dict[str,
     if details:
         event["details"] = details
     _events.get().append(event)
+    listener = _listener.get()
+    if listener is not None:
+        try:
+            listener(event)
+        except Exception:
+            logger.exception("Middleware event listener failed")
 
 
 def get_events() -> list[dict[str, Any]]:
@@ -0,0 +1,362 @@
+import json
+import re
+from datetime import date
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+# A cited temperature this close (°C) to a tool value is read as quoting it.
+TEMP_MATCH_TOLERANCE_C = 1.0
+# A cited temperature this far outside every tool value cannot come from the data.
+TEMP_CONTRADICTION_MARGIN_C = 3.0
+
+_NUMBER = r"[-−]?\d{1,3}(?:\.\d+)?"
+_TEMPERATURE = re.compile(
+    rf"(?:(?P<low>{_NUMBER})\s*(?:°|º)?\s*(?:–|—|-|to|and)\s*)?(?P<high>{_NUMBER})"
+    r"(?:\s?(?:°|º)\s?(?P<sym>[CF])?|\s?(?P<letter>[CF])\b|\s?degrees?(?:\s+(?P<word>celsius|fahrenheit|C|F)\b)?)",
+    re.IGNORECASE,
+)
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [("january", "jan"), ("february", "feb"), ("march", "mar"), ("april", "apr"), ("may",), ("june", "jun"),
+         ("july", "jul"), ("august", "aug"), ("september", "sep", "sept"), ("october", "oct"),
+         ("november", "nov"), ("december", "dec")],
+        start=1,
+    )
+    for name in names
+}
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_MONTH_DAY = re.compile(
+    rf"\b(?:(?P<m1>{_MONTH})\.?\s+(?P<d1>\d{{1,2}})(?:st|nd|rd|th)?|(?P<d2>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<m2>{_MONTH})\b\.?)",
+    re.IGNORECASE,
+)
+_OTHER_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_CAPITALIZED = re.compile(r"(?<![\w'’])[A-ZÀ-ÖØ-Þ][\w'’-]+")
+_WORD = re.compile(r"[\w'’-]+")
+_SENTENCE_END = ".!?:\n"
+_LEADING_MARKUP = " \t*_#>-•\"'“‘(["
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_WEEKDAY = re.compile(rf"\b(?:{'|'.join(_WEEKDAYS)})\b", re.IGNORECASE)
+# Capitalized words that name no place, business or person.
+_COMMON_CAPS = {"i", "i'm", "i'd", "i'll", "i've", "ok", "utc", "celsius", "fahrenheit", *_WEEKDAYS, *_MONTHS}
+# Closed-class words a sentence may start with; any other sentence-initial
+# capitalized word ("Eiffel tower closes ...") counts as a proper noun.
+_SENTENCE_STARTERS = {
+    "a", "an", "the", "it", "it's", "its", "there", "there's", "this", "that", "these", "those", "you", "you'll",
+    "your", "we", "our", "they", "he", "she", "and", "but", "or", "so", "also", "then", "if", "on", "in", "at", "for",
+    "from", "by", "with", "during", "both", "all", "each", "every", "most", "some", "yes", "no", "expect", "bring",
+    "pack", "plan", "consider", "here", "here's", "overall", "however", "what", "which", "where", "when", "how", "who",
+    "do", "does", "did", "is", "are", "was", "will", "would", "could", "can", "should", "shall", "please", "sure",
+    "thanks", "great", "just", "let", "let's",
+}
+# Words that state nothing on their own: forecast phrasing, clarifying
+# questions and function words.  A sentence made only of these, checked
+# claims and the resolved place names has no content the rules cannot verify.
+_FILLER = {
+    "a", "an", "the", "and", "or", "but", "so", "then", "also", "just", "about", "around", "roughly", "near",
+    "nearly", "up", "to", "from", "between", "of", "on", "in", "at", "for", "with", "by", "during", "over", "as",
+    "it", "it's", "its", "this", "that", "these", "those", "there", "there's", "here", "here's", "is", "are", "was",
+    "were", "be", "been", "will", "would", "should", "could", "can", "may", "might", "do", "does", "did", "you",
+    "your", "you're", "you'll", "we", "i", "i'm", "i'll", "i'd", "me", "my", "let", "let's", "please", "thanks",
+    "sure", "ok", "okay", "yes", "great", "expect", "expected", "forecast", "forecasts", "weather", "outlook",
+    "temperature", "temperatures", "temps", "high", "highs", "low", "lows", "max", "min", "maximum", "minimum",
+    "mean", "average", "daytime", "overnight", "hit", "hitting", "reach", "reaching", "peak", "peaking", "climb",
+    "climbing", "drop", "dropping", "stay", "staying", "range", "ranging", "degrees", "day", "days", "look",
+    "looks", "like", "mostly", "partly", "clear", "skies", "sky", "c", "f", "celsius", "fahrenheit", "utc",
+    "which", "what", "where", "when", "how", "city", "town", "place", "country", "region", "destination", "meant",
+    "travel", "traveling", "travelling", "trip", "visit", "visiting", "going", "go", "planning", "want", "prefer",
+    "dates", "date", "know", "more", "details", "tell",
+}
+_SENTENCES = re.compile(r"(?<=[.!?])\s+|\n+")
+_NEGATION = re.compile(r"\b(?:no|not|never|without|none|neither|nor|unlikely)\b|n[’']t\b", re.IGNORECASE)
+# Condition words in a response, and the MET symbol fragments that back them.
+# Wind has no symbol; "windy" or "calm" is left to the verifier.
+_CONDITIONS = {
+    "rain": (re.compile(r"\b(?:rain\w*|showers?|drizzle|downpours?|umbrellas?|wet)\b", re.I), ("rain", "sleet")),
+    "snow": (re.compile(r"\b(?:snow\w*|sleet|blizzards?)\b", re.I), ("snow", "sleet")),
+    "thunder": (re.compile(r"\b(?:thunder\w*|storms?|stormy|lightning)\b", re.I), ("thunder",)),
+    "sun": (re.compile(r"\b(?:sunny|sunshine|clear skies|clear sky)\b", re.I), ("clearsky", "fair")),
+    "cloud": (re.compile(r"\b(?:cloud\w*|overcast)\b", re.I), ("cloudy",)),
+    "fog": (re.compile(r"\b(?:fog\w*|mist\w*)\b", re.I), ("fog",)),
+    "wind": (re.compile(r"\b(?:wind\w*|gust\w*|breez\w*)\b", re.I), ()),
+}
+
+
+@dataclass
+class Claims:
+    """Checkable specifics found in a response."""
+    temperatures_c: List[float] = field(default_factory=list)
+    range_starts_c: List[float] = field(default_factory=list)  # "12" in "12–18°C"; the unit is only implied
+    dates: List[str] = field(default_factory=list)  # "YYYY-MM-DD" or "MM-DD" when the year is not given
+    weekdays: Set[int] = field(default_factory=set)
+    numbers: List[str] = field(default_factory=list)
+    proper_nouns: List[str] = field(default_factory=list)
+    conditions: Set[str] = field(default_factory=set)
+    words: List[str] = field(default_factory=list)  # words no claim or filler accounts for
+    statements: List["Statement"] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return any((self.temperatures_c, self.range_starts_c, self.dates, self.weekdays, self.numbers, self.proper_nouns, self.conditions))
+
+
+@dataclass
+class Statement:
+    """One sentence: the days, temperatures and conditions it names, and the words nothing accounts for."""
+    dates: List[str]
+    weekdays: Set[int]
+    temperatures_c: List[float]  # range starts included
+    conditions: Set[str]
+    negated: bool
+    words: List[str]
+
+
+@dataclass
+class DayFacts:
+    """One forecast day: its temperatures (min, max, mean), dominant symbol and whether it is wet."""
+    temperatures_c: List[float] = field(default_factory=list)
+    symbol: Optional[str] = None
+    wet: bool = False
+
+
+@dataclass
+class Observations:
+    """Weather facts parsed from tool results (full ``json`` or ``compact`` encoding)."""
+    results: int = 0
+    errors: int = 0
+    unparsed: int = 0
+    temperatures_c: List[float] = field(default_factory=list)
+    days: Dict[str, DayFacts] = field(default_factory=dict)
+    words: Set[str] = field(default_factory=set)
+
+
+@dataclass(frozen=True)
+class RuleVerdict:
+    """``verdict`` is "PASS" / "FAIL: <reason>" when the rules are certain, None to defer to the verifier."""
+    verdict: Optional[str]
+    rule: str
+
+
+def extract_claims(text: str) -> Claims:
+    """Pull temperatures (as °C), dates, other numbers, proper nouns and weather conditions out of *text*.
+
+    Each sentence is also kept as a `Statement` so the rules can check it
+    against the day it names and see whether it says anything else.
+    """
+    claims = Claims()
+    for sentence in _SENTENCES.split(text):
+        if not sentence.strip():
+            continue
+        part = _scan(sentence)
+        claims.temperatures_c += part.temperatures_c
+        claims.range_starts_c += part.range_starts_c
+        claims.dates += part.dates
+        claims.weekdays |= part.weekdays
+        claims.numbers += part.numbers
+        claims.proper_nouns += part.proper_nouns
+        claims.conditions |= part.conditions
+        claims.words += part.words
+        claims.statements.append(Statement(
+            dates=part.dates,
+            weekdays=part.weekdays,
+            temperatures_c=part.range_starts_c + part.temperatures_c,
+            conditions=part.conditions,
+            negated=bool(_NEGATION.search(sentence)),
+            words=part.words,
+        ))
+    return claims
+
+
+def _scan(sentence: str) -> Claims:
+    claims = Claims()
+
+    def temperature(match: re.Match) -> str:
+        unit = (match["sym"] or match["letter"] or match["word"] or "C")[0].upper()
+        for value, into in ((match["low"], claims.range_starts_c), (match["high"], claims.temperatures_c)):
+            if value is not None:
+                degrees = float(value.replace("−", "-"))
+                into.append((degrees - 32) * 5 / 9 if unit == "F" else degrees)
+        return " "
+
+    def iso_date(match: re.Match) -> str:
+        claims.dates.append(match.group(0))
+        return " "
+
+    def month_day(match: re.Match) -> str:
+        month = _MONTHS[(match["m1"] or match["m2"]).lower()]
+        claims.dates.append(f"{month:02d}-{int(match['d1'] or match['d2']):02d}")
+        return " "
+
+    rest = _TEMPERATURE.sub(temperature, sentence)
+    rest = _ISO_DATE.sub(iso_date, rest)
+    rest = _MONTH_DAY.sub(month_day, rest)
+    claims.numbers = _OTHER_NUMBER.findall(rest)
+    for match in _CAPITALIZED.finditer(sentence):
+        before = sentence[:match.start()].rstrip(_LEADING_MARKUP)
+        word = _possessive(match.group(0).lower())
+        initial = not before or before[-1] in _SENTENCE_END
+        if word not in _COMMON_CAPS and not (initial and word in _SENTENCE_STARTERS):
+            claims.proper_nouns.append(word)
+    claims.weekdays = {_WEEKDAYS.index(m.group(0).lower()) for m in _WEEKDAY.finditer(sentence)}
+    claims.conditions = {name for name, (pattern, _) in _CONDITIONS.items() if pattern.search(sentence)}
+    for pattern, _ in _CONDITIONS.values():
+        rest = pattern.sub(" ", rest)
+    for token in _WORD.findall(rest):
+        word = _possessive(token.lower()).strip("'’-")
+        if word and not word[0].isdigit() and word not in _FILLER and word not in _WEEKDAYS and word not in _MONTHS:
+            claims.words.append(word)
+    return claims
+
+
+def _possessive(word: str) -> str:
+    return word[:-2] if word.endswith(("'s", "’s")) else word
+
+
+def parse_observations(contents: Iterable[str]) -> Observations:
+    """Parse weather tool results; single results and ``{"results": [...]}`` batches, days as rows or a cols/rows table."""
+    observations = Observations()
+    for content in contents:
+        try:
+            data = json.loads(content)
+        except ValueError:
+            observations.unparsed += 1
+            continue
+        if not isinstance(data, dict):
+            observations.unparsed += 1
+            continue
+        for result in data["results"] if isinstance(data.get("results"), list) else [data]:
+            _add_result(observations, result)
+    return observations
+
+
+def _add_result(observations: Observations, result: dict) -> None:
+    observations.results += 1
+    if not result.get("ok"):
+        observations.errors += 1
+    for key in ("query", "place"):
+        if isinstance(result.get(key), str):
+            observations.words.update(w.lower() for w in _WORD.findall(result[key]))
+    days = result.get("days") or []
+    if isinstance(days, dict):
+        days = [dict(zip(days.get("cols", []), row)) for row in days.get("rows", [])]
+    for day in days:
+        key = day.get("date") or day.get("date_utc")
+        if not key:
+            continue
+        values = [float(day[k]) for k in ("tmin_c", "tmax_c", "tmean_c") if isinstance(day.get(k), (int, float))]
+        observations.temperatures_c += values
+        facts = observations.days.setdefault(key, DayFacts())
+        facts.temperatures_c += values
+        facts.symbol = facts.symbol or day.get("symbol")
+        facts.wet = facts.wet or (day.get("precip_mm") or 0) > 0
+
+
+def precheck(response_text: str, tool_contents: Iterable[str], user_text: str = "") -> RuleVerdict:
+    """Decide grounding locally when the answer is certain.
+
+    FAIL when a sentence that only states the forecast — nothing but filler,
+    the resolved place, days, conditions and temperatures — ties a
+    temperature to one forecast day (or to the place) and it lies well
+    outside that day's (or the place's) values.  Temperatures the user
+    mentioned and negated sentences never FAIL.
+
+    PASS only when every sentence is either such a forecast statement that
+    names exactly one forecast day (by weekday or date) and matches it, or
+    has no factual content at all (a clarifying question); other dates and
+    weekdays must be forecast days and numbers and proper nouns must come
+    from the user's messages or the resolved places.  Anything else — tool
+    errors, several forecast places, figures not tied to one day, negated
+    conditions, unmatched names, any other content — is left to the verifier.
+    """
+    claims = extract_claims(response_text)
+    observations = parse_observations(tool_contents)
+
+    contradiction = _contradiction(claims, observations, user_text)
+    if contradiction is not None:
+        return contradiction
+
+    if observations.errors:
+        return RuleVerdict(None, "tool_error")
+    if observations.unparsed:
+        return RuleVerdict(None, "unparsed_tool_result")
+
+    known = {w.lower() for w in _WORD.findall(user_text)} | observations.words
+    if any(n not in known for n in claims.proper_nouns):
+        return RuleVerdict(None, "unknown_proper_noun")
+    if any(n not in known for n in claims.numbers):
+        return RuleVerdict(None, "unknown_number")
+    if any(w not in observations.words for w in claims.words):
+        return RuleVerdict(None, "unverified_content")
+    if not claims:
+        return RuleVerdict("PASS", "no_claims")
+    if any(not _forecast_days(observations, [d], set()) for d in claims.dates):
+        return RuleVerdict(None, "date_not_in_forecast")
+    if any(not _forecast_days(observations, [], {w}) for w in claims.weekdays):
+        return RuleVerdict(None, "weekday_not_in_forecast")
+    for statement in claims.statements:
+        if not (statement.temperatures_c or statement.conditions):
+            continue
+        if observations.results != 1:
+            return RuleVerdict(None, "several_forecasts")
+        if statement.negated:
+            return RuleVerdict(None, "negated_claim")
+        days = _forecast_days(observations, statement.dates, statement.weekdays)
+        if len(days) != 1:
+            return RuleVerdict(None, "claim_not_tied_to_one_day")
+        facts = observations.days[days.pop()]
+        if any(
+            not facts.temperatures_c or min(abs(cited - t) for t in facts.temperatures_c) > TEMP_MATCH_TOLERANCE_C
+            for cited in statement.temperatures_c
+        ):
+            return RuleVerdict(None, "temperature_not_quoted")
+        for condition in statement.conditions:
+            backed = facts.symbol is not None and any(s in facts.symbol for s in _CONDITIONS[condition][1])
+            if not (backed or (condition == "rain" and facts.wet)):
+                return RuleVerdict(None, "condition_not_in_forecast")
+    return RuleVerdict("PASS", "claims_match_tools")
+
+
+def _contradiction(claims: Claims, observations: Observations, user_text: str) -> Optional[RuleVerdict]:
+    """FAIL for a forecast statement citing a temperature well outside its day's (or place's) values."""
+    if observations.results != 1 or observations.errors:
+        return None
+    user_claims = extract_claims(user_text)
+    mentioned = user_claims.range_starts_c + user_claims.temperatures_c
+    mentioned += [float(n.replace(",", ".")) for n in _OTHER_NUMBER.findall(user_text)]
+    for statement in claims.statements:
+        if not statement.temperatures_c or statement.negated:
+            continue
+        if any(w not in observations.words for w in statement.words):
+            continue  # says more than the forecast ("used to 30°C at home", "rated to 0°C")
+        days = _forecast_days(observations, statement.dates, statement.weekdays)
+        if len(days) == 1:
+            day = days.pop()
+            values, scope = observations.days[day].temperatures_c, f"for {day}"
+        elif not statement.dates and not statement.weekdays and statement.words:
+            values, scope = observations.temperatures_c, "for the forecast"
+        else:
+            continue
+        if not values:
+            continue
+        low, high = min(values), max(values)
+        for cited in statement.temperatures_c:
+            if any(abs(cited - m) < 0.05 for m in mentioned):
+                continue
+            if cited < low - TEMP_CONTRADICTION_MARGIN_C or cited > high + TEMP_CONTRADICTION_MARGIN_C:
+                return RuleVerdict(
+                    f"FAIL: The response cites {cited:.0f}°C, but the weather tool returned temperatures "
+                    f"{scope} between {low:g} and {high:g}°C.",
+                    "temperature_out_of_range",
+                )
+    return None
+
+
+def _forecast_days(observations: Observations, dates: List[str], weekdays: Set[int]) -> Set[str]:
+    """Forecast days matching any of *dates* ("YYYY-MM-DD" or "MM-DD") or *weekdays*."""
+    matched = set()
+    for key in observations.days:
+        if key in dates or key[5:] in dates:
+            matched.add(key)
+        elif weekdays and len(key) == 10 and date.fromisoformat(key).weekday() in weekdays:
+            matched.add(key)
+    return matched
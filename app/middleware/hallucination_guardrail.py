@@ -1,18 +1,46 @@
+import asyncio
+import contextvars
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any, Annotated
 
 from langchain.agents.middleware import AgentMiddleware, hook_config
 from langchain.agents.middleware.types import AgentState
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.runtime import Runtime
 
 from app.middleware.event_collector import emit_event
+from app.middleware.grounding_rules import RuleVerdict, precheck
 from app.prompts.grounding_check_prompt import GROUNDING_CHECK_PROMPT
 
 logger = logging.getLogger(__name__)
 
 MAX_HALLUCINATION_RETRIES = 1
+VERIFICATION_MODEL = "google_genai:gemini-3-flash-preview"
+# "off", "build" (construct the verifier client at startup) or "connect"
+# (build it and send one tiny request so the first check reuses a warm connection).
+GROUNDING_PREWARM = os.environ.get("GROUNDING_PREWARM", "off").strip().lower()
+PREWARM_PROMPT = "Reply with the single word PASS."
+# Decide trivially grounded (or clearly contradicted) responses locally; "off" sends every check to the verifier.
+GROUNDING_RULES = os.environ.get("GROUNDING_RULES", "on").strip().lower() != "off"
+# "blocking": a response is verified before the run ends.  "speculative": a
+# streamed response is delivered while the verifier runs, and retracted and
+# regenerated if it fails.  Overridable per request (`set_grounding_mode`).
+GROUNDING_MODES = ("blocking", "speculative")
+GROUNDING_MODE = os.environ.get("GROUNDING_MODE", "blocking").strip().lower()
+# Verifier verdicts are reused for identical (tool observations, response) pairs; 0 entries disables.
+VERDICT_CACHE_MAX_ENTRIES = int(os.environ.get("GROUNDING_CACHE_MAX_ENTRIES", "2048"))
+VERDICT_CACHE_TTL = float(os.environ.get("GROUNDING_CACHE_TTL_SECONDS", "3600"))
+# User/assistant lines kept as conversation context for the verifier.
+SUMMARY_PARTS = 10
 
 
 def _extract_text(content) -> str:
@@ -30,9 +58,134 @@ def _extract_text(content) -> str:
     return str(content)
 
 
+def _normalize_observation(content: str) -> str:
+    """Canonical form of a tool result: JSON re-serialized with sorted keys, else whitespace-collapsed."""
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return " ".join(content.split())
+
+
+class VerdictCache:
+    """Thread-safe LRU + TTL cache of verifier verdicts, keyed by content hash.
+
+    The key is a SHA-256 over the normalized tool observations (sorted, so
+    parallel results in any order match) and the whitespace-collapsed
+    response, so retried, regenerated-identical and replayed checks are
+    answered locally.  Only PASS / FAIL verdicts are stored.
+    """
+
+    def __init__(self, *, max_entries: int = VERDICT_CACHE_MAX_ENTRIES, ttl: float = VERDICT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(tool_contents: list[str], response_text: str) -> str:
+        digest = hashlib.sha256()
+        for observation in sorted(_normalize_observation(c) for c in tool_contents):
+            digest.update(observation.encode())
+            digest.update(b"\x00")
+        digest.update(b"\x01")
+        digest.update(" ".join(response_text.split()).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() >= entry[1]:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def store(self, key: str, verdict: str) -> None:
+        if self.max_entries <= 0 or not verdict.startswith(("PASS", "FAIL")):
+            return
+        with self._lock:
+            self._entries[key] = (verdict, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self) -> float | None:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 3) if lookups else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate(),
+            }
+
+
+@dataclass
+class _PendingCheck:
+    task: asyncio.Task
+    retries_so_far: int
+    rule: str
+
+
+class SpeculativeChecks:
+    """Verifier calls a speculative request left running, settled once the response is delivered."""
+
+    def __init__(self):
+        self.pending: list[_PendingCheck] = []
+
+    def cancel(self) -> None:
+        for check in self.pending:
+            check.task.cancel()
+        self.pending.clear()
+
+
+_speculative: contextvars.ContextVar[SpeculativeChecks | None] = contextvars.ContextVar(
+    "speculative_grounding", default=None
+)
+
+
+def set_grounding_mode(mode: str | None = None) -> SpeculativeChecks | None:
+    """Choose how the current request's responses are verified (default `GROUNDING_MODE`).
+
+    Call at the start of each request, before the agent runs.  In
+    speculative mode the returned holder collects the checks left running;
+    pass it to `HallucinationGuardrailMiddleware.aresolve` after delivery.
+    Speculative checks need the async agent API; sync runs always block.
+    """
+    mode = (mode or GROUNDING_MODE).lower()
+    if mode not in GROUNDING_MODES:
+        logger.warning("Unknown grounding mode %r — using blocking", mode)
+        mode = "blocking"
+    checks = SpeculativeChecks() if mode == "speculative" else None
+    _speculative.set(checks)
+    return checks
+
+
 class HallucinationGuardrailState(AgentState):
-    """Extended state to track hallucination retry count."""
+    """Extended state: the turn's retry count and the verifier context, maintained incrementally.
+
+    ``grounding_upto`` is how many thread messages have been folded into
+    ``grounding_summary`` (the last `SUMMARY_PARTS` user/assistant lines) and
+    ``grounding_observations`` (``[tool name, content]`` pairs of the latest
+    turn that called tools).  ``grounding_new_turn`` marks that a user
+    message arrived since the last tool result.
+    """
     hallucination_retries: Annotated[int, 0]
+    grounding_upto: Annotated[int, 0]
+    grounding_summary: Annotated[list[str], []]
+    grounding_observations: Annotated[list[list[str]], []]
+    grounding_new_turn: Annotated[bool, False]
 
 
 class HallucinationGuardrailMiddleware(AgentMiddleware):
@@ -46,12 +199,258 @@ class HallucinationGuardrailMiddleware(AgentMiddleware):
     state_schema = HallucinationGuardrailState
     tools = []
 
-    def __init__(self, verification_model=None):
+    def __init__(self, verification_model=None, verdict_cache: VerdictCache | None = None):
         super().__init__()
         self._verification_model = verification_model
+        self.verdict_cache = verdict_cache or VerdictCache()
+        self._lock = threading.Lock()
+        self.model_init_ms: float | None = None
+        self.checks = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.first_ms: float | None = None
+        self.rule_checks = 0
+        self.rule_verdicts = 0
 
     @hook_config(can_jump_to=["model"])
     def after_model(self, state: HallucinationGuardrailState, runtime: Runtime) -> dict[str, Any] | None:
+        context = self._fold(state)
+        return {**context, **(self._check(state, context) or {})}
+
+    @hook_config(can_jump_to=["model"])
+    async def aafter_model(self, state: HallucinationGuardrailState, runtime: Runtime) -> dict[str, Any] | None:
+        context = self._fold(state)
+        return {**context, **(await self._acheck(state, context) or {})}
+
+    def _check(self, state: HallucinationGuardrailState, context: dict[str, Any]) -> dict[str, Any] | None:
+        retries_so_far = context["hallucination_retries"]
+        response_text = self._response_to_check(state, retries_so_far)
+        if response_text is None:
+            return None
+        rules = self._precheck(context, response_text)
+        if rules.verdict is not None:
+            return self._apply_verdict(rules.verdict, retries_so_far, method="rules", rule=rules.rule)
+        cache_key, cached = self._cached_verdict(context, response_text)
+        if cached is not None:
+            return self._apply_verdict(cached, retries_so_far, method="cache", rule=rules.rule)
+        check_prompt = self._build_check_prompt(context, response_text)
+
+        # Run grounding check
+        try:
+            verification_model = self._get_verification_model()
+            logger.debug("Invoking verification model for grounding check")
+            start = time.perf_counter()
+            result = verification_model.invoke([HumanMessage(content=check_prompt)])
+            latency_ms = self._record_latency(start)
+            verdict = _extract_text(result.content).strip()
+            logger.info("Grounding check raw verdict: %r (%.0fms)", verdict, latency_ms)
+        except Exception:
+            self._on_verifier_error()
+            return None
+        self.verdict_cache.store(cache_key, verdict)
+
+        return self._apply_verdict(verdict, retries_so_far, method="llm", rule=rules.rule, latency_ms=round(latency_ms))
+
+    async def _acheck(self, state: HallucinationGuardrailState, context: dict[str, Any]) -> dict[str, Any] | None:
+        retries_so_far = context["hallucination_retries"]
+        response_text = self._response_to_check(state, retries_so_far)
+        if response_text is None:
+            return None
+        rules = self._precheck(context, response_text)
+        if rules.verdict is not None:
+            return self._apply_verdict(rules.verdict, retries_so_far, method="rules", rule=rules.rule)
+        cache_key, cached = self._cached_verdict(context, response_text)
+        if cached is not None:
+            return self._apply_verdict(cached, retries_so_far, method="cache", rule=rules.rule)
+        check_prompt = self._build_check_prompt(context, response_text)
+
+        speculative = _speculative.get()
+        if speculative is not None:
+            # Let the run finish and the response reach the client; `aresolve` settles the verdict.
+            task = asyncio.create_task(self._averify(check_prompt, cache_key))
+            speculative.pending.append(_PendingCheck(task, retries_so_far, rules.rule))
+            emit_event(
+                middleware="hallucination_guardrail",
+                status="speculative",
+                message="Grounding check running while the response is delivered",
+                details={"rule": rules.rule, "skip_rate": self._skip_rate()},
+            )
+            return None
+
+        outcome = await self._averify(check_prompt, cache_key)
+        if outcome is None:
+            return None
+        verdict, latency_ms = outcome
+        return self._apply_verdict(verdict, retries_so_far, method="llm", rule=rules.rule, latency_ms=round(latency_ms))
+
+    async def aresolve(self, speculative: SpeculativeChecks) -> dict[str, Any] | None:
+        """Await the checks a speculative run left pending.
+
+        Returns None when the delivered response stands, else the agent input
+        that regenerates it: the corrective message and the bumped retry
+        count, as a blocking check would have routed back to the model.
+        """
+        correction = None
+        while speculative.pending:
+            check = speculative.pending.pop(0)
+            outcome = await check.task
+            if outcome is None or correction is not None:
+                continue
+            verdict, latency_ms = outcome
+            update = self._apply_verdict(
+                verdict, check.retries_so_far,
+                method="llm", rule=check.rule, latency_ms=round(latency_ms), mode="speculative",
+            )
+            if update is not None:
+                correction = {"messages": update["messages"], "hallucination_retries": update["hallucination_retries"]}
+        return correction
+
+    async def _averify(self, check_prompt: str, cache_key: str) -> tuple[str, float] | None:
+        """Ask the verifier and cache its verdict; (verdict, latency_ms), or None when the call failed."""
+        try:
+            verification_model = self._get_verification_model()
+            logger.debug("Invoking verification model for grounding check")
+            start = time.perf_counter()
+            result = await verification_model.ainvoke([HumanMessage(content=check_prompt)])
+            latency_ms = self._record_latency(start)
+            verdict = _extract_text(result.content).strip()
+            logger.info("Grounding check raw verdict: %r (%.0fms)", verdict, latency_ms)
+        except Exception:
+            self._on_verifier_error()
+            return None
+        self.verdict_cache.store(cache_key, verdict)
+        return verdict, latency_ms
+
+    async def aprewarm(self, mode: str = GROUNDING_PREWARM) -> None:
+        """Build the verifier before the first request ("build"), and optionally open its connection ("connect")."""
+        if mode not in ("build", "connect"):
+            return
+        try:
+            verification_model = self._get_verification_model()
+            if mode == "connect":
+                start = time.perf_counter()
+                await verification_model.ainvoke([HumanMessage(content=PREWARM_PROMPT)])
+                logger.info("Grounding verifier pre-warmed in %.0fms", (time.perf_counter() - start) * 1000)
+        except Exception:
+            logger.warning("Grounding verifier pre-warm failed — the first check will warm it", exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "model_ready": self._verification_model is not None,
+                "model_init_ms": round(self.model_init_ms, 1) if self.model_init_ms is not None else None,
+                "checks": self.checks,
+                "first_ms": round(self.first_ms, 1) if self.first_ms is not None else None,
+                "avg_ms": round(self.total_ms / self.checks, 1) if self.checks else None,
+                "max_ms": round(self.max_ms, 1),
+                "last_ms": round(self.last_ms, 1),
+                "rule_checks": self.rule_checks,
+                "rule_verdicts": self.rule_verdicts,
+                "skip_rate": self._skip_rate(),
+                "verdict_cache": self.verdict_cache.stats(),
+            }
+
+    def _get_verification_model(self):
+        """The verifier, built once per process on first use and shared by every check."""
+        if self._verification_model is None:
+            with self._lock:
+                if self._verification_model is None:
+                    start = time.perf_counter()
+                    self._verification_model = init_chat_model(VERIFICATION_MODEL, tags=[TAG_NOSTREAM])
+                    self.model_init_ms = (time.perf_counter() - start) * 1000
+                    logger.info("Built grounding verifier %s in %.0fms", VERIFICATION_MODEL, self.model_init_ms)
+        return self._verification_model
+
+    def _record_latency(self, start: float) -> float:
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.checks += 1
+            self.total_ms += latency_ms
+            self.max_ms = max(self.max_ms, latency_ms)
+            self.last_ms = latency_ms
+            if self.first_ms is None:
+                self.first_ms = latency_ms
+        return latency_ms
+
+    def _skip_rate(self) -> float | None:
+        return round(self.rule_verdicts / self.rule_checks, 3) if self.rule_checks else None
+
+    def _cached_verdict(self, context: dict[str, Any], response_text: str) -> tuple[str, str | None]:
+        """The verdict-cache key for this check and the cached verdict, if any."""
+        tool_contents = [content for _, content in context["grounding_observations"]]
+        key = self.verdict_cache.key(tool_contents, response_text)
+        verdict = self.verdict_cache.get(key)
+        if verdict is not None:
+            logger.info("Grounding check answered from the verdict cache: %r", verdict)
+        return key, verdict
+
+    def _precheck(self, context: dict[str, Any], response_text: str) -> RuleVerdict:
+        """Run the local rules (see `grounding_rules.precheck`) and count how often they settle the check."""
+        if not GROUNDING_RULES:
+            return RuleVerdict(None, "disabled")
+        tool_contents = [content for _, content in context["grounding_observations"]]
+        user_text = "\n".join(part for part in context["grounding_summary"] if part.startswith("User: "))
+        rules = precheck(response_text, tool_contents, user_text)
+        with self._lock:
+            self.rule_checks += 1
+            if rules.verdict is not None:
+                self.rule_verdicts += 1
+        logger.info("Grounding rules: %s (%s)", rules.verdict or "deferred to verifier", rules.rule)
+        return rules
+
+    @staticmethod
+    def _fold(state: HallucinationGuardrailState) -> dict[str, Any]:
+        """Fold the messages added since the last call into the verifier context.
+
+        Only ``messages[grounding_upto:]`` is read, so the cost per call is the
+        size of the new messages, not of the thread.  A new user message
+        starts a turn: the retry budget is reset, and the next tool result
+        replaces the previous turn's observations (a turn that calls no tools keeps them, so follow-ups
+        about that forecast stay checkable).
+        """
+        messages = state["messages"]
+        upto = state.get("grounding_upto", 0)
+        summary = list(state.get("grounding_summary") or [])
+        observations = list(state.get("grounding_observations") or [])
+        new_turn = state.get("grounding_new_turn", False)
+        retries = state.get("hallucination_retries", 0)
+        if upto > len(messages):
+            # The thread was rewritten under us; rebuild from the start.
+            upto, summary, observations = 0, [], []
+
+        for msg in messages[upto:]:
+            if isinstance(msg, HumanMessage):
+                content = _extract_text(msg.content)
+                if content.startswith("[SYSTEM:"):
+                    continue
+                summary.append(f"User: {content}")
+                new_turn = True
+                retries = 0
+            elif isinstance(msg, ToolMessage):
+                if new_turn:
+                    observations, new_turn = [], False
+                tool_name = getattr(msg, "name", "unknown_tool")
+                observations.append([tool_name, _extract_text(msg.content)])
+            elif isinstance(msg, AIMessage):
+                if hasattr(msg, "tool_calls") and msg.tool_calls:
+                    tool_names = [tc["name"] for tc in msg.tool_calls]
+                    summary.append(f"Assistant: [called tools: {', '.join(tool_names)}]")
+                else:
+                    text = _extract_text(msg.content)
+                    snippet = text[:100] + "..." if len(text) > 100 else text
+                    summary.append(f"Assistant: {snippet}")
+
+        return {
+            "hallucination_retries": retries,
+            "grounding_upto": len(messages),
+            "grounding_summary": summary[-SUMMARY_PARTS:],
+            "grounding_observations": observations,
+            "grounding_new_turn": new_turn,
+        }
+
+    def _response_to_check(self, state: HallucinationGuardrailState, retries_so_far: int) -> str | None:
+        """Return the response text to verify, or None when the response should not be checked."""
         messages = state["messages"]
         last_message = messages[-1]
 
@@ -70,7 +469,6 @@ class HallucinationGuardrailMiddleware(AgentMiddleware):
             return None
 
         # Gate 2: Check retry budget
-        retries_so_far = state.get("hallucination_retries", 0)
         if retries_so_far >= MAX_HALLUCINATION_RETRIES:
             logger.warning(
                 "Hallucination retry budget exhausted (%d/%d). Accepting response as-is.",
@@ -82,47 +480,49 @@ class HallucinationGuardrailMiddleware(AgentMiddleware):
             "Hallucination guardrail running grounding check (attempt %d/%d, response length=%d chars)",
             retries_so_far + 1, MAX_HALLUCINATION_RETRIES + 1, len(response_text),
         )
+        return response_text
 
-        # Gather context for grounding check
-        tool_observations = self._extract_tool_observations(messages)
-        conversation_summary = self._summarize_conversation(messages)
+    def _build_check_prompt(self, context: dict[str, Any], response_text: str) -> str:
+        """Return the verifier prompt for *response_text* from the folded context."""
+        tool_observations = "\n".join(f"[{name}]: {content}" for name, content in context["grounding_observations"])
+        conversation_summary = "\n".join(context["grounding_summary"])
         logger.debug(
             "Grounding check context — tool_observations=%d chars, conversation_summary=%d chars",
             len(tool_observations), len(conversation_summary),
         )
 
-        check_prompt = GROUNDING_CHECK_PROMPT.format(
+        return GROUNDING_CHECK_PROMPT.format(
             conversation_summary=conversation_summary,
             tool_observations=tool_observations if tool_observations else "(No tools were called)",
             response_to_check=response_text,
         )
 
-        # Run grounding check
-        try:
-            verification_model = self._verification_model or init_chat_model(
-                "google_genai:gemini-3-flash-preview"
-            )
-            logger.debug("Invoking verification model for grounding check")
-            result = verification_model.invoke([HumanMessage(content=check_prompt)])
-            verdict = _extract_text(result.content).strip()
-            logger.info("Grounding check raw verdict: %r", verdict)
-        except Exception:
-            logger.exception("Grounding check model invocation failed — accepting response as-is")
-            emit_event(
-                middleware="hallucination_guardrail",
-                status="error",
-                message="Grounding check model invocation failed — accepting response as-is",
-            )
-            return None
+    @staticmethod
+    def _on_verifier_error() -> None:
+        logger.exception("Grounding check model invocation failed — accepting response as-is")
+        emit_event(
+            middleware="hallucination_guardrail",
+            status="error",
+            message="Grounding check model invocation failed — accepting response as-is",
+        )
+
+    def _apply_verdict(self, verdict: str, retries_so_far: int, **details) -> dict[str, Any] | None:
+        """Translate a verdict into a state update (or None to accept the response).
 
-        # Parse verdict
+        *details* (``method`` "rules", "cache" or "llm", the rule that
+        decided or deferred, verifier latency) are added to the event with
+        the running skip rate (the share of checks settled by the rules) and
+        the verdict cache's hit rate.
+        """
+        details["skip_rate"] = self._skip_rate()
+        details["cache_hit_rate"] = self.verdict_cache.hit_rate()
         if verdict.startswith("PASS"):
             logger.info("Grounding check PASSED — response is well-grounded")
             emit_event(
                 middleware="hallucination_guardrail",
                 status="passed",
                 message="Grounding check PASSED — response is well-grounded",
-                details={"verdict": verdict},
+                details={"verdict": verdict, **details},
             )
             return None
 
@@ -136,7 +536,12 @@ class HallucinationGuardrailMiddleware(AgentMiddleware):
                 middleware="hallucination_guardrail",
                 status="failed",
                 message=f"Grounding check FAILED — re-routing to model for correction",
-                details={"verdict": verdict, "reason": failure_reason, "retry": retries_so_far + 1},
+                details={
+                    "verdict": verdict,
+                    "reason": failure_reason,
+                    "retry": retries_so_far + 1,
+                    **details,
+                },
             )
 
             corrective_msg = HumanMessage(content=(
@@ -165,35 +570,5 @@ class HallucinationGuardrailMiddleware(AgentMiddleware):
         )
         return None
 
-    @staticmethod
-    def _extract_tool_observations(messages) -> str:
-        """Extract all ToolMessage contents from the conversation."""
-        observations = []
-        for msg in messages:
-            if isinstance(msg, ToolMessage):
-                tool_name = getattr(msg, "name", "unknown_tool")
-                observations.append(f"[{tool_name}]: {_extract_text(msg.content)}")
-        return "\n".join(observations)
-
-    @staticmethod
-    def _summarize_conversation(messages) -> str:
-        """Build a brief summary of user requests for context."""
-        parts = []
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                content = _extract_text(msg.content)
-                if content.startswith("[SYSTEM:"):
-                    continue
-                parts.append(f"User: {content}")
-            elif isinstance(msg, AIMessage):
-                if hasattr(msg, "tool_calls") and msg.tool_calls:
-                    tool_names = [tc["name"] for tc in msg.tool_calls]
-                    parts.append(f"Assistant: [called tools: {', '.join(tool_names)}]")
-                else:
-                    text = _extract_text(msg.content)
-                    snippet = text[:100] + "..." if len(text) > 100 else text
-                    parts.append(f"Assistant: {snippet}")
-        return "\n".join(parts[-10:])
-
 
 hallucination_guardrail = HallucinationGuardrailMiddleware()
@@ -0,0 +1,225 @@
+import logging
+from typing import Any, Annotated
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import AgentState
+from langchain.chat_models import init_chat_model
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.runtime import Runtime
+
+from app.middleware.event_collector import emit_event
+from app.prompts.history_summary_prompt import HISTORY_SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+HISTORY_MAX_TOKENS = 6000
+HISTORY_TARGET_TOKENS = 3000
+SUMMARY_MODEL = "google_genai:gemini-3-flash-preview"
+SUMMARY_SNIPPET_CHARS = 600
+
+
+def _extract_text(content) -> str:
+    """Extract plain text from a content field that may be a string or a list of blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, str):
+                parts.append(block)
+            elif isinstance(block, dict) and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+        return "\n".join(parts)
+    return str(content)
+
+
+def _is_user_turn(msg) -> bool:
+    """A real user message (not a guardrail's system-injected correction)."""
+    return isinstance(msg, HumanMessage) and not _extract_text(msg.content).startswith("[SYSTEM:")
+
+
+class HistoryWindowState(AgentState):
+    """Extended state holding the rolling summary of turns outside the window."""
+    history_summary: Annotated[str, ""]
+    history_summary_upto: Annotated[int, 0]
+
+
+class HistoryWindowMiddleware(AgentMiddleware):
+    """Caps the prompt to a token-budgeted window of recent turns plus a rolling summary.
+
+    ``before_model`` checks the unsummarized tail of the thread.  Once it exceeds
+    ``max_tokens``, the oldest whole turns are folded into ``history_summary``
+    until the tail fits ``target_tokens``; ``history_summary_upto`` records how
+    many messages the summary covers.  Both live in the checkpointed thread
+    state, so the summary is only recomputed — incrementally, from the previous
+    summary plus the newly evicted turns — when the window slides.  The gap
+    between the two budgets keeps that to once every few turns.
+
+    ``wrap_model_call`` then sends the model only the window, with the summary
+    appended to the system prompt.  The thread state itself keeps every message.
+    """
+
+    state_schema = HistoryWindowState
+    tools = []
+
+    def __init__(
+        self,
+        *,
+        max_tokens: int = HISTORY_MAX_TOKENS,
+        target_tokens: int = HISTORY_TARGET_TOKENS,
+        summary_model=None,
+        token_counter=count_tokens_approximately,
+    ):
+        super().__init__()
+        if target_tokens > max_tokens:
+            raise ValueError("target_tokens must not exceed max_tokens")
+        self.max_tokens = max_tokens
+        self.target_tokens = target_tokens
+        self._summary_model = summary_model
+        self._token_counter = token_counter
+
+    # ── Summary maintenance ──────────────────────────────────────────────────
+
+    def before_model(self, state: HistoryWindowState, runtime: Runtime) -> dict[str, Any] | None:
+        plan = self._plan_fold(state)
+        if plan is None:
+            return None
+        prompt, new_upto = plan
+        try:
+            result = self._get_summary_model().invoke([HumanMessage(content=prompt)])
+        except Exception:
+            self._on_summary_error()
+            return None
+        return self._apply_summary(_extract_text(result.content).strip(), state, new_upto)
+
+    async def abefore_model(self, state: HistoryWindowState, runtime: Runtime) -> dict[str, Any] | None:
+        plan = self._plan_fold(state)
+        if plan is None:
+            return None
+        prompt, new_upto = plan
+        try:
+            result = await self._get_summary_model().ainvoke([HumanMessage(content=prompt)])
+        except Exception:
+            self._on_summary_error()
+            return None
+        return self._apply_summary(_extract_text(result.content).strip(), state, new_upto)
+
+    def _plan_fold(self, state: HistoryWindowState) -> tuple[str, int] | None:
+        """Return (summary prompt, new cursor) when the window must slide, else None."""
+        messages = state["messages"]
+        upto = state.get("history_summary_upto", 0)
+        tail_tokens = self._token_counter(messages[upto:])
+        if tail_tokens <= self.max_tokens:
+            return None
+
+        new_upto = self._window_start(messages, upto)
+        if new_upto <= upto:
+            logger.info("History window over budget (%d tokens) but the current turn cannot be split", tail_tokens)
+            return None
+
+        logger.info(
+            "History window sliding: folding messages %d-%d into the summary (%d tokens over the window)",
+            upto, new_upto - 1, tail_tokens,
+        )
+        prompt = HISTORY_SUMMARY_PROMPT.format(
+            previous_summary=state.get("history_summary") or "(empty)",
+            new_turns=self._render(messages[upto:new_upto]),
+        )
+        return prompt, new_upto
+
+    def _window_start(self, messages, upto: int) -> int:
+        """Earliest user-turn boundary after *upto* whose tail fits ``target_tokens``.
+
+        Always keeps at least the latest user turn, and never splits a turn, so
+        tool calls and their ToolMessages stay together.
+        """
+        boundaries = [i for i in range(upto, len(messages)) if _is_user_turn(messages[i])]
+        if not boundaries:
+            return upto
+        tail_tokens = 0
+        start = boundaries[-1]
+        end = len(messages)
+        for boundary in reversed(boundaries):
+            tail_tokens += self._token_counter(messages[boundary:end])
+            end = boundary
+            if tail_tokens > self.target_tokens:
+                break
+            start = boundary
+        return start
+
+    @staticmethod
+    def _render(messages) -> str:
+        lines = []
+        for msg in messages:
+            text = _extract_text(msg.content)
+            if len(text) > SUMMARY_SNIPPET_CHARS:
+                text = text[:SUMMARY_SNIPPET_CHARS] + "..."
+            if isinstance(msg, HumanMessage):
+                if text.startswith("[SYSTEM:"):
+                    continue
+                lines.append(f"User: {text}")
+            elif isinstance(msg, ToolMessage):
+                lines.append(f"Tool [{getattr(msg, 'name', None) or 'tool'}]: {text}")
+            elif isinstance(msg, AIMessage):
+                if msg.tool_calls:
+                    lines.append(f"Assistant: [called tools: {', '.join(tc['name'] for tc in msg.tool_calls)}]")
+                if text.strip():
+                    lines.append(f"Assistant: {text}")
+        return "\n".join(lines)
+
+    def _get_summary_model(self):
+        if self._summary_model is None:
+            self._summary_model = init_chat_model(SUMMARY_MODEL, tags=[TAG_NOSTREAM])
+        return self._summary_model
+
+    @staticmethod
+    def _on_summary_error() -> None:
+        logger.exception("History summary model invocation failed — sending full history this turn")
+        emit_event(
+            middleware="history_window",
+            status="error",
+            message="History summarization failed — sending full history this turn",
+        )
+
+    def _apply_summary(self, summary: str, state: HistoryWindowState, new_upto: int) -> dict[str, Any] | None:
+        if not summary:
+            self._on_summary_error()
+            return None
+        folded = new_upto - state.get("history_summary_upto", 0)
+        logger.info("History summary updated — %d messages folded, summary=%d chars", folded, len(summary))
+        emit_event(
+            middleware="history_window",
+            status="success",
+            message=f"Folded {folded} older messages into the conversation summary",
+            details={
+                "summarized_messages": new_upto,
+                "window_messages": len(state["messages"]) - new_upto,
+                "summary_chars": len(summary),
+            },
+        )
+        return {"history_summary": summary, "history_summary_upto": new_upto}
+
+    # ── Prompt windowing ─────────────────────────────────────────────────────
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._windowed(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._windowed(request))
+
+    @staticmethod
+    def _windowed(request):
+        upto = request.state.get("history_summary_upto", 0)
+        summary = request.state.get("history_summary")
+        if not upto or not summary:
+            return request
+        system_prompt = request.system_prompt or ""
+        return request.override(
+            messages=request.messages[upto:],
+            system_prompt=(
+                f"{system_prompt}\n\n"
+                f"CONVERSATION SUMMARY (earlier turns, condensed — treat as prior context):\n{summary}"
+            ).strip(),
+        )
@@ -1,8 +1,13 @@
+import asyncio
+import contextvars
 import logging
+import os
 import random
+import threading
 import time
 
-from langchain.agents.middleware import wrap_model_call, wrap_tool_call
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
 
 from app.middleware.event_collector import emit_event
 
@@ -16,104 +21,267 @@ MAX_TOOL_RETRIES = 2
 TOOL_INITIAL_DELAY = 1.5
 TOOL_BACKOFF_FACTOR = 2.0
 
+# Tool calls from one AIMessage run concurrently; these bound the fan-out per
+# request and the wall-clock time (all attempts + backoff) of each call.
+MAX_PARALLEL_TOOLS = int(os.environ.get("MAX_PARALLEL_TOOLS", "4"))
+TOOL_CALL_DEADLINE = float(os.environ.get("TOOL_CALL_DEADLINE_SECONDS", "30"))
 
-@wrap_model_call
-def retry_model(request, handler):
-    """Retry model calls on transient failures with exponential backoff + jitter."""
-    logger.info("Model call started")
-    for attempt in range(MAX_MODEL_RETRIES):
-        try:
-            result = handler(request)
-            if attempt > 0:
-                logger.info("Model call succeeded on attempt %d/%d", attempt + 1, MAX_MODEL_RETRIES)
-                emit_event(
-                    middleware="retry_model",
-                    status="recovered",
-                    message=f"Model call succeeded after {attempt + 1} attempts",
-                    details={"attempts": attempt + 1},
-                )
-            else:
-                logger.info("Model call succeeded on first attempt")
-                emit_event(middleware="retry_model", status="success", message="Model call succeeded on first attempt")
+
+class _ToolSlots:
+    """Per-request concurrency limit shared by that request's tool calls."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sync = threading.BoundedSemaphore(limit)
+        self.aio = asyncio.Semaphore(limit)
+
+
+_default_slots = _ToolSlots(MAX_PARALLEL_TOOLS)
+_tool_slots: contextvars.ContextVar[_ToolSlots | None] = contextvars.ContextVar("tool_slots", default=None)
+
+
+def set_tool_parallelism(limit: int | None = None) -> None:
+    """Limit how many tool calls the current request runs at once (default `MAX_PARALLEL_TOOLS`).
+
+    Call at the start of each request, before the agent runs, so the tool
+    tasks LangGraph spawns inherit the limit.  Runs that never call it share
+    one process-wide limit.
+    """
+    _tool_slots.set(_ToolSlots(max(1, limit or MAX_PARALLEL_TOOLS)))
+
+
+def _slots() -> _ToolSlots:
+    return _tool_slots.get() or _default_slots
+
+
+def _backoff(attempt: int, initial_delay: float, backoff_factor: float) -> float:
+    """Exponential backoff delay for *attempt* (0-based) plus up to 50% jitter."""
+    delay = initial_delay * (backoff_factor ** attempt)
+    return delay + random.uniform(0, delay * 0.5)
+
+
+class RetryModelMiddleware(AgentMiddleware):
+    """Retry model calls on transient failures with exponential backoff + jitter.
+
+    Implements both the sync and async hooks so that ``agent.ainvoke`` never
+    blocks the event loop while backing off.
+    """
+
+    @property
+    def name(self) -> str:
+        return "retry_model"
+
+    def wrap_model_call(self, request, handler):
+        logger.info("Model call started")
+        for attempt in range(MAX_MODEL_RETRIES):
+            try:
+                result = handler(request)
+            except Exception as e:
+                sleep_time = self._on_failure(attempt, e)
+                if sleep_time is None:
+                    raise
+                time.sleep(sleep_time)
+                continue
+            self._on_success(attempt)
             return result
-        except Exception as e:
-            if attempt == MAX_MODEL_RETRIES - 1:
-                logger.error(
-                    "Model call failed after %d attempts. Final error: %s: %s",
-                    MAX_MODEL_RETRIES, type(e).__name__, e,
-                )
-                emit_event(
-                    middleware="retry_model",
-                    status="failed",
-                    message=f"Model call failed after {MAX_MODEL_RETRIES} attempts",
-                    details={"error": f"{type(e).__name__}: {e}", "attempts": MAX_MODEL_RETRIES},
-                )
-                raise
-            delay = MODEL_INITIAL_DELAY * (MODEL_BACKOFF_FACTOR ** attempt)
-            jitter = random.uniform(0, delay * 0.5)
-            sleep_time = delay + jitter
-            logger.warning(
-                "Model call attempt %d/%d failed (%s: %s) — retrying in %.1fs",
-                attempt + 1, MAX_MODEL_RETRIES, type(e).__name__, e, sleep_time,
+
+    async def awrap_model_call(self, request, handler):
+        logger.info("Model call started")
+        for attempt in range(MAX_MODEL_RETRIES):
+            try:
+                result = await handler(request)
+            except Exception as e:
+                sleep_time = self._on_failure(attempt, e)
+                if sleep_time is None:
+                    raise
+                await asyncio.sleep(sleep_time)
+                continue
+            self._on_success(attempt)
+            return result
+
+    @staticmethod
+    def _on_success(attempt: int) -> None:
+        if attempt > 0:
+            logger.info("Model call succeeded on attempt %d/%d", attempt + 1, MAX_MODEL_RETRIES)
+            emit_event(
+                middleware="retry_model",
+                status="recovered",
+                message=f"Model call succeeded after {attempt + 1} attempts",
+                details={"attempts": attempt + 1},
+            )
+        else:
+            logger.info("Model call succeeded on first attempt")
+            emit_event(middleware="retry_model", status="success", message="Model call succeeded on first attempt")
+
+    @staticmethod
+    def _on_failure(attempt: int, e: Exception) -> float | None:
+        """Record a failed attempt; return the backoff delay, or None when out of retries."""
+        if attempt == MAX_MODEL_RETRIES - 1:
+            logger.error(
+                "Model call failed after %d attempts. Final error: %s: %s",
+                MAX_MODEL_RETRIES, type(e).__name__, e,
             )
             emit_event(
                 middleware="retry_model",
-                status="retrying",
-                message=f"Model call attempt {attempt + 1}/{MAX_MODEL_RETRIES} failed — retrying in {sleep_time:.1f}s",
-                details={"error": f"{type(e).__name__}: {e}", "attempt": attempt + 1, "delay_s": round(sleep_time, 1)},
+                status="failed",
+                message=f"Model call failed after {MAX_MODEL_RETRIES} attempts",
+                details={"error": f"{type(e).__name__}: {e}", "attempts": MAX_MODEL_RETRIES},
             )
-            time.sleep(sleep_time)
-
-
-@wrap_tool_call
-def retry_tool(request, handler):
-    """Retry tool calls on transient failures with exponential backoff + jitter."""
-    tool_name = getattr(request, "name", None) or getattr(request, "tool_name", "unknown")
-    logger.info("Tool call started: %s", tool_name)
-    for attempt in range(MAX_TOOL_RETRIES):
-        try:
-            result = handler(request)
-            if attempt > 0:
-                logger.info("Tool call '%s' succeeded on attempt %d/%d", tool_name, attempt + 1, MAX_TOOL_RETRIES)
-                emit_event(
-                    middleware="retry_tool",
-                    status="recovered",
-                    message=f"Tool '{tool_name}' succeeded after {attempt + 1} attempts",
-                    details={"tool": tool_name, "attempts": attempt + 1},
-                )
-            else:
-                logger.info("Tool call '%s' succeeded on first attempt", tool_name)
-                emit_event(
-                    middleware="retry_tool",
-                    status="success",
-                    message=f"Tool '{tool_name}' succeeded on first attempt",
-                    details={"tool": tool_name},
-                )
+            return None
+        sleep_time = _backoff(attempt, MODEL_INITIAL_DELAY, MODEL_BACKOFF_FACTOR)
+        logger.warning(
+            "Model call attempt %d/%d failed (%s: %s) — retrying in %.1fs",
+            attempt + 1, MAX_MODEL_RETRIES, type(e).__name__, e, sleep_time,
+        )
+        emit_event(
+            middleware="retry_model",
+            status="retrying",
+            message=f"Model call attempt {attempt + 1}/{MAX_MODEL_RETRIES} failed — retrying in {sleep_time:.1f}s",
+            details={"error": f"{type(e).__name__}: {e}", "attempt": attempt + 1, "delay_s": round(sleep_time, 1)},
+        )
+        return sleep_time
+
+
+class RetryToolMiddleware(AgentMiddleware):
+    """Retry tool calls on transient failures with exponential backoff + jitter.
+
+    Implements both the sync and async hooks so that ``agent.ainvoke`` never
+    blocks the event loop while backing off.  Parallel tool calls from one
+    AIMessage each hold a slot of the request's `set_tool_parallelism` limit
+    only while an attempt runs (not while backing off), and every call gets a
+    `TOOL_CALL_DEADLINE` budget: when it runs out the model receives an error
+    ToolMessage instead of the whole run failing.  On the sync path a running
+    attempt cannot be interrupted, so the deadline only stops further retries.
+    """
+
+    @property
+    def name(self) -> str:
+        return "retry_tool"
+
+    def wrap_tool_call(self, request, handler):
+        tool_name = self._tool_name(request)
+        logger.info("Tool call started: %s", tool_name)
+        deadline = time.monotonic() + TOOL_CALL_DEADLINE
+        slots = _slots()
+        for attempt in range(MAX_TOOL_RETRIES):
+            try:
+                with slots.sync:
+                    result = handler(request)
+            except Exception as e:
+                sleep_time = self._on_failure(tool_name, attempt, e)
+                if sleep_time is None:
+                    raise
+                if time.monotonic() + sleep_time >= deadline:
+                    return self._on_deadline(request, tool_name, attempt + 1)
+                time.sleep(sleep_time)
+                continue
+            self._on_success(tool_name, attempt)
+            return result
+
+    async def awrap_tool_call(self, request, handler):
+        tool_name = self._tool_name(request)
+        logger.info("Tool call started: %s", tool_name)
+        deadline = time.monotonic() + TOOL_CALL_DEADLINE
+        slots = _slots()
+        for attempt in range(MAX_TOOL_RETRIES):
+            timeout = None
+            try:
+                async with slots.aio:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return self._on_deadline(request, tool_name, attempt)
+                    async with asyncio.timeout(remaining) as timeout:
+                        result = await handler(request)
+            except Exception as e:
+                # Only our own deadline ends the call here; a TimeoutError raised
+                # by the tool itself (e.g. an HTTP read timeout) is retried.
+                if timeout is not None and timeout.expired():
+                    return self._on_deadline(request, tool_name, attempt + 1)
+                sleep_time = self._on_failure(tool_name, attempt, e)
+                if sleep_time is None:
+                    raise
+                if time.monotonic() + sleep_time >= deadline:
+                    return self._on_deadline(request, tool_name, attempt + 1)
+                await asyncio.sleep(sleep_time)
+                continue
+            self._on_success(tool_name, attempt)
             return result
-        except Exception as e:
-            if attempt == MAX_TOOL_RETRIES - 1:
-                logger.error(
-                    "Tool call '%s' failed after %d attempts. Final error: %s: %s",
-                    tool_name, MAX_TOOL_RETRIES, type(e).__name__, e,
-                )
-                emit_event(
-                    middleware="retry_tool",
-                    status="failed",
-                    message=f"Tool '{tool_name}' failed after {MAX_TOOL_RETRIES} attempts",
-                    details={"tool": tool_name, "error": f"{type(e).__name__}: {e}", "attempts": MAX_TOOL_RETRIES},
-                )
-                raise
-            delay = TOOL_INITIAL_DELAY * (TOOL_BACKOFF_FACTOR ** attempt)
-            jitter = random.uniform(0, delay * 0.5)
-            sleep_time = delay + jitter
-            logger.warning(
-                "Tool call '%s' attempt %d/%d failed (%s: %s) — retrying in %.1fs",
-                tool_name, attempt + 1, MAX_TOOL_RETRIES, type(e).__name__, e, sleep_time,
+
+    @staticmethod
+    def _tool_name(request) -> str:
+        tool_call = getattr(request, "tool_call", None) or {}
+        return (
+            getattr(request, "name", None)
+            or getattr(request, "tool_name", None)
+            or tool_call.get("name")
+            or "unknown"
+        )
+
+    @staticmethod
+    def _on_deadline(request, tool_name: str, attempts: int) -> ToolMessage:
+        """Give up on a call that exhausted its deadline; the model sees an error result."""
+        logger.error("Tool call '%s' exceeded its %.0fs deadline after %d attempt(s)", tool_name, TOOL_CALL_DEADLINE, attempts)
+        emit_event(
+            middleware="retry_tool",
+            status="timeout",
+            message=f"Tool '{tool_name}' exceeded its {TOOL_CALL_DEADLINE:.0f}s deadline",
+            details={"tool": tool_name, "attempts": attempts, "deadline_s": TOOL_CALL_DEADLINE},
+        )
+        tool_call = getattr(request, "tool_call", None) or {}
+        return ToolMessage(
+            content=f"Error: '{tool_name}' did not complete within {TOOL_CALL_DEADLINE:.0f} seconds.",
+            tool_call_id=tool_call.get("id", ""),
+            name=tool_name,
+            status="error",
+        )
+
+    @staticmethod
+    def _on_success(tool_name: str, attempt: int) -> None:
+        if attempt > 0:
+            logger.info("Tool call '%s' succeeded on attempt %d/%d", tool_name, attempt + 1, MAX_TOOL_RETRIES)
+            emit_event(
+                middleware="retry_tool",
+                status="recovered",
+                message=f"Tool '{tool_name}' succeeded after {attempt + 1} attempts",
+                details={"tool": tool_name, "attempts": attempt + 1},
+            )
+        else:
+            logger.info("Tool call '%s' succeeded on first attempt", tool_name)
+            emit_event(
+                middleware="retry_tool",
+                status="success",
+                message=f"Tool '{tool_name}' succeeded on first attempt",
+                details={"tool": tool_name},
+            )
+
+    @staticmethod
+    def _on_failure(tool_name: str, attempt: int, e: Exception) -> float | None:
+        """Record a failed attempt; return the backoff delay, or None when out of retries."""
+        if attempt == MAX_TOOL_RETRIES - 1:
+            logger.error(
+                "Tool call '%s' failed after %d attempts. Final error: %s: %s",
+                tool_name, MAX_TOOL_RETRIES, type(e).__name__, e,
             )
             emit_event(
                 middleware="retry_tool",
-                status="retrying",
-                message=f"Tool '{tool_name}' attempt {attempt + 1}/{MAX_TOOL_RETRIES} failed — retrying in {sleep_time:.1f}s",
-                details={"tool": tool_name, "error": f"{type(e).__name__}: {e}", "attempt": attempt + 1, "delay_s": round(sleep_time, 1)},
+                status="failed",
+                message=f"Tool '{tool_name}' failed after {MAX_TOOL_RETRIES} attempts",
+                details={"tool": tool_name, "error": f"{type(e).__name__}: {e}", "attempts": MAX_TOOL_RETRIES},
             )
-            time.sleep(sleep_time)
+            return None
+        sleep_time = _backoff(attempt, TOOL_INITIAL_DELAY, TOOL_BACKOFF_FACTOR)
+        logger.warning(
+            "Tool call '%s' attempt %d/%d failed (%s: %s) — retrying in %.1fs",
+            tool_name, attempt + 1, MAX_TOOL_RETRIES, type(e).__name__, e, sleep_time,
+        )
+        emit_event(
+            middleware="retry_tool",
+            status="retrying",
+            message=f"Tool '{tool_name}' attempt {attempt + 1}/{MAX_TOOL_RETRIES} failed — retrying in {sleep_time:.1f}s",
+            details={"tool": tool_name, "error": f"{type(e).__name__}: {e}", "attempt": attempt + 1, "delay_s": round(sleep_time, 1)},
+        )
+        return sleep_time
+
+
+retry_model = RetryModelMiddleware()
+retry_tool = RetryToolMiddleware()
@@ -33,6 +33,52 @@ class ToolSelectorMiddleware(LLMToolSelectorMiddleware):
         self._prompt_template = self.system_prompt
 
     def wrap_model_call(self, request, handler):
+        available_tool_names = self._begin_selection(request)
+        if self._is_guardrail_retry(request):
+            return handler(request)
+
+        # Capture which tools the base class actually passes to the handler
+        # by wrapping the handler to inspect the filtered request.
+        selected_names_capture = []
+
+        def _capturing_handler(filtered_request):
+            selected_names_capture.extend(
+                t.name for t in filtered_request.tools if not isinstance(t, dict)
+            )
+            return handler(filtered_request)
+
+        try:
+            result = super().wrap_model_call(request, _capturing_handler)
+        except (ValueError, AssertionError) as exc:
+            self._on_selection_error(exc, available_tool_names)
+            return handler(request)
+
+        self._on_selection_success(selected_names_capture)
+        return result
+
+    async def awrap_model_call(self, request, handler):
+        available_tool_names = self._begin_selection(request)
+        if self._is_guardrail_retry(request):
+            return await handler(request)
+
+        selected_names_capture = []
+
+        async def _capturing_handler(filtered_request):
+            selected_names_capture.extend(
+                t.name for t in filtered_request.tools if not isinstance(t, dict)
+            )
+            return await handler(filtered_request)
+
+        try:
+            result = await super().awrap_model_call(request, _capturing_handler)
+        except (ValueError, AssertionError) as exc:
+            self._on_selection_error(exc, available_tool_names)
+            return await handler(request)
+
+        self._on_selection_success(selected_names_capture)
+        return result
+
+    def _begin_selection(self, request) -> list[str]:
         # Inject today's date into the prompt template so the LLM can reason
         # about whether travel dates fall within the 7-day forecast window.
         self.system_prompt = self._prompt_template.format(today=date.today().isoformat())
@@ -42,7 +88,10 @@ class ToolSelectorMiddleware(LLMToolSelectorMiddleware):
             "Tool selector invoked — %d tool(s) available: %s",
             len(available_tool_names), available_tool_names,
         )
+        return available_tool_names
 
+    @staticmethod
+    def _is_guardrail_retry(request) -> bool:
         # Gate: skip selection when processing a system-injected corrective
         # message (e.g. hallucination guardrail retry).  These start with
         # "[SYSTEM:" and would confuse the selection model.
@@ -58,42 +107,32 @@ class ToolSelectorMiddleware(LLMToolSelectorMiddleware):
                         status="skipped",
                         message="Skipped — processing hallucination guardrail retry",
                     )
-                    return handler(request)
+                    return True
                 logger.info("Tool selector evaluating user message: %.120s", content)
                 break
+        return False
 
-        # Capture which tools the base class actually passes to the handler
-        # by wrapping the handler to inspect the filtered request.
-        selected_names_capture = []
-
-        def _capturing_handler(filtered_request):
-            selected_names_capture.extend(
-                t.name for t in filtered_request.tools if not isinstance(t, dict)
-            )
-            return handler(filtered_request)
-
-        try:
-            result = super().wrap_model_call(request, _capturing_handler)
-        except (ValueError, AssertionError) as exc:
-            # Graceful fallback: if the selection model hallucinated invalid
-            # tool names or returned an unexpected format, keep all tools.
-            logger.warning(
-                "Tool selector failed (%s: %s) — falling back to all tools: %s",
-                type(exc).__name__, exc, available_tool_names,
-            )
-            emit_event(
-                middleware="tool_selector",
-                status="error",
-                message="Tool selection failed — keeping all tools available",
-                details={"error": str(exc)},
-            )
-            return handler(request)
+    @staticmethod
+    def _on_selection_error(exc: Exception, available_tool_names: list[str]) -> None:
+        # Graceful fallback: if the selection model hallucinated invalid
+        # tool names or returned an unexpected format, keep all tools.
+        logger.warning(
+            "Tool selector failed (%s: %s) — falling back to all tools: %s",
+            type(exc).__name__, exc, available_tool_names,
+        )
+        emit_event(
+            middleware="tool_selector",
+            status="error",
+            message="Tool selection failed — keeping all tools available",
+            details={"error": str(exc)},
+        )
 
-        logger.info("Tool selector completed — selected tools: %s", selected_names_capture)
+    @staticmethod
+    def _on_selection_success(selected_names: list[str]) -> None:
+        logger.info("Tool selector completed — selected tools: %s", selected_names)
         emit_event(
             middleware="tool_selector",
             status="success",
             message=f"Tool selection completed",
-            details={"selected_tools": selected_names_capture},
+            details={"selected_tools": selected_names},
         )
-        return result
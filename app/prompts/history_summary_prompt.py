@@ -0,0 +1,17 @@
+HISTORY_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a traveler and Ava, a travel assistant.
+Older turns are removed from the assistant's context, so this summary is the only memory of them.
+
+## Current summary
+{previous_summary}
+
+## Turns to fold into the summary
+{new_turns}
+
+## Instructions
+Rewrite the summary so it also covers the new turns. Keep everything that could change future advice:
+- Destinations discussed or chosen, trip dates and length, travelers, budget, interests, constraints.
+- Decisions made and options the traveler rejected.
+- Weather data the assistant reported (place, dates, temperatures) — keep the numbers exact.
+- Open questions the assistant is waiting on.
+Drop greetings, pleasantries and wording details. Use terse bullet points, at most 15 bullets.
+Output only the summary."""
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+CoordKey = Tuple[float, float]
+
+
+@dataclass
+class CachedForecast:
+    """Aggregated forecast days for one coordinate plus the HTTP validators that produced them."""
+    days: list
+    expires_at: float
+    last_modified: str | None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def fresh_for(self, seconds: float) -> bool:
+        """True if the entry is still fresh *seconds* from now."""
+        return time.time() + seconds < self.expires_at
+
+
+def _expires_at(headers: Mapping[str, str], default_ttl: float) -> float:
+    """Absolute expiry (epoch seconds) from an `Expires` header, or now + default_ttl."""
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            logger.debug("Unparseable Expires header %r — using default TTL", expires)
+    return time.time() + default_ttl
+
+
+class ForecastCache:
+    """Thread-safe LRU cache of aggregated MET Norway forecasts, keyed by rounded lat/lon.
+
+    Entries follow the response's HTTP caching headers:
+
+    - Until `Expires` an entry is served without touching the network.
+    - After that it is kept (not dropped) so the next fetch can send
+      `If-Modified-Since: <Last-Modified>`; a 304 only extends the expiry and
+      the already-aggregated days are served again without re-parsing.
+
+    MET asks clients to use at most 4 decimals; 2 decimals (~1 km) lets nearby
+    queries for the same city share one entry.
+    """
+
+    def __init__(self, *, max_entries: int = 1024, default_ttl: float = 600.0, precision: int = 2):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.precision = precision
+        self._entries: OrderedDict[CoordKey, CachedForecast] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def key(self, lat: float, lon: float) -> CoordKey:
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def get(self, key: CoordKey) -> CachedForecast | None:
+        """Return the entry for *key*, fresh or stale (check `.fresh`)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key: CoordKey, days: list, headers: Mapping[str, str]) -> CachedForecast:
+        entry = CachedForecast(
+            days=days,
+            expires_at=_expires_at(headers, self.default_ttl),
+            last_modified=headers.get("Last-Modified"),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def revalidated(self, key: CoordKey, entry: CachedForecast, headers: Mapping[str, str]) -> CachedForecast:
+        """Extend *entry* after a 304 Not Modified response."""
+        with self._lock:
+            entry.expires_at = _expires_at(headers, self.default_ttl)
+            entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+        return entry
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: "hit", "miss" or "revalidated"."""
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+            }
@@ -0,0 +1,254 @@
+import bisect
+import csv
+import logging
+import math
+import os
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from app.tools.external.geocode_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.tsv")
+
+# A name resolves offline only when its most populous candidate is at least
+# this many times larger than the runner-up ("London" -> London, GB rather
+# than London, Ontario).  Closer calls ("Valencia", "San Jose") go to Nominatim.
+AMBIGUITY_RATIO = 10
+# Cell size (degrees) of the coordinate grid used by `nearest`.
+GRID_DEGREES = 1.0
+LON_CELLS = round(360 / GRID_DEGREES)
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Bundled names also carried by other notable places that are not bundled, so
+# the population check above cannot see them.  Without a country qualifier
+# these go to Nominatim ("Portland" may mean Oregon or Maine).
+SHARED_NAMES = {
+    "portland", "kingston", "springfield", "cambridge", "victoria", "hamilton",
+    "perth", "newcastle", "richmond", "alexandria", "santiago", "cordoba",
+    "la paz", "santa cruz", "san juan", "tripoli", "hyderabad", "halifax",
+    "plymouth", "durham", "salem", "rochester",
+}
+
+# Common ways users write a country that differ from the bundled country names.
+COUNTRY_ALIASES = {
+    "usa": "US",
+    "u s a": "US",
+    "u s": "US",
+    "america": "US",
+    "united states of america": "US",
+    "uk": "GB",
+    "u k": "GB",
+    "england": "GB",
+    "scotland": "GB",
+    "great britain": "GB",
+    "britain": "GB",
+    "holland": "NL",
+    "the netherlands": "NL",
+    "uae": "AE",
+    "emirates": "AE",
+    "czech republic": "CZ",
+    "korea": "KR",
+    "republic of korea": "KR",
+    "russian federation": "RU",
+    "viet nam": "VN",
+    "burma": "MM",
+    "turkiye": "TR",
+    "macau": "MO",
+}
+
+
+@dataclass(frozen=True)
+class Place:
+    """One bundled gazetteer entry."""
+    name: str
+    country_code: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+    timezone: str
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country}"
+
+
+class Gazetteer:
+    """Offline index of major populated places, loaded lazily from a bundled TSV.
+
+    Places live in parallel arrays (coordinates and populations in `array`
+    buffers); every normalized name and alias is a row in a sorted key list,
+    so exact and prefix lookups are a `bisect`.  There is no fuzzy matching:
+    with a few hundred places, a near miss is more often an unlisted place
+    ("Grenada", "Homburg") than a typo, so it goes to Nominatim.  The file is
+    read once, on first use.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._names: List[str] = []
+        self._country_codes: List[str] = []
+        self._countries: List[str] = []
+        self._timezones: List[str] = []
+        self._lat = array("d")
+        self._lon = array("d")
+        self._population = array("q")
+        self._keys: List[str] = []
+        self._key_rows = array("I")
+        self._country_index: dict[str, str] = {}
+        self._grid: dict[Tuple[int, int], List[int]] = {}
+        self.hits = 0
+        self.fallbacks = 0
+
+    def resolve(self, query: str) -> Tuple[Optional[Place], str]:
+        """Resolve a "City" or "City, Country" query.
+
+        Returns ``(place, status)`` where status is "exact" for a confident
+        match, "ambiguous" when several places share the name without a clear
+        winner (or it is in `SHARED_NAMES` and no country was given), and
+        "unknown" when the gazetteer cannot answer (unlisted or misspelled
+        place, unrecognised qualifier such as a state or region).
+        """
+        self._ensure_loaded()
+        place, status = self._resolve(query)
+        with self._lock:
+            if place is None:
+                self.fallbacks += 1
+            else:
+                self.hits += 1
+        return place, status
+
+    def prefix(self, text: str, limit: int = 10) -> List[Place]:
+        """Places whose name or alias starts with *text*, most populous first."""
+        self._ensure_loaded()
+        key = normalize_query(text)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "\uffff", lo)
+        rows = {self._key_rows[i] for i in range(lo, hi)}
+        ranked = sorted(rows, key=lambda row: -self._population[row])
+        return [self._place(row) for row in ranked[:limit]]
+
+    def top(self, limit: int) -> List[Place]:
+        """The *limit* most populous places."""
+        self._ensure_loaded()
+        ranked = sorted(range(len(self._names)), key=lambda row: -self._population[row])
+        return [self._place(row) for row in ranked[:limit]]
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[Tuple[Place, float]]:
+        """The bundled place closest to (*lat*, *lon*) within *max_km*, with its distance in km."""
+        self._ensure_loaded()
+        lat_cells = math.ceil(max_km / KM_PER_DEGREE / GRID_DEGREES)
+        lon_cells = min(LON_CELLS // 2, math.ceil(lat_cells / max(math.cos(math.radians(lat)), 0.01)))
+        row, col = _cell(lat, lon)
+        best, best_km = -1, max_km
+        for i in range(row - lat_cells, row + lat_cells + 1):
+            for j in range(col - lon_cells, col + lon_cells + 1):
+                for place_row in self._grid.get((i, j % LON_CELLS), ()):
+                    km = _haversine_km(lat, lon, self._lat[place_row], self._lon[place_row])
+                    if km <= best_km:
+                        best, best_km = place_row, km
+        return (self._place(best), best_km) if best >= 0 else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "places": len(self._names),
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+            }
+
+    def _resolve(self, query: str) -> Tuple[Optional[Place], str]:
+        parts = [p for p in normalize_query(query).split(", ") if p]
+        if not parts or len(parts) > 2:
+            return None, "unknown"
+
+        country_code = None
+        if len(parts) == 2:
+            country_code = self._country_index.get(parts[1])
+            if country_code is None:
+                return None, "unknown"
+
+        name = parts[0]
+        rows = self._exact_rows(name, country_code)
+        if not rows:
+            return None, "unknown"
+        if country_code is None and name in SHARED_NAMES:
+            return None, "ambiguous"
+
+        rows.sort(key=lambda row: -self._population[row])
+        if len(rows) > 1 and self._population[rows[0]] < AMBIGUITY_RATIO * self._population[rows[1]]:
+            return None, "ambiguous"
+        return self._place(rows[0]), "exact"
+
+    def _exact_rows(self, key: str, country_code: Optional[str]) -> List[int]:
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_right(self._keys, key, lo)
+        rows = {self._key_rows[i] for i in range(lo, hi)}
+        return [row for row in rows if country_code is None or self._country_codes[row] == country_code]
+
+    def _place(self, row: int) -> Place:
+        return Place(
+            name=self._names[row],
+            country_code=self._country_codes[row],
+            country=self._countries[row],
+            lat=self._lat[row],
+            lon=self._lon[row],
+            population=self._population[row],
+            timezone=self._timezones[row],
+        )
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _load(self) -> None:
+        keyed: List[Tuple[str, int]] = []
+        with open(self.path, encoding="utf-8", newline="") as f:
+            for row, rec in enumerate(csv.DictReader(f, delimiter="\t")):
+                self._names.append(rec["name"])
+                self._country_codes.append(rec["country_code"])
+                self._countries.append(rec["country"])
+                self._timezones.append(rec["timezone"])
+                self._lat.append(float(rec["lat"]))
+                self._lon.append(float(rec["lon"]))
+                self._population.append(int(rec["population"]))
+                self._grid.setdefault(_cell(self._lat[row], self._lon[row]), []).append(row)
+
+                names = [rec["name"], *(a for a in rec["aliases"].split(";") if a)]
+                for key in {normalize_query(n) for n in names}:
+                    keyed.append((key, row))
+                self._country_index[normalize_query(rec["country"])] = rec["country_code"]
+                self._country_index[rec["country_code"].lower()] = rec["country_code"]
+
+        keyed.sort()
+        self._keys = [key for key, _ in keyed]
+        self._key_rows = array("I", (row for _, row in keyed))
+        self._country_index.update(COUNTRY_ALIASES)
+        logger.info("Loaded gazetteer: %d places, %d names from %s", len(self._names), len(self._keys), self.path)
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / GRID_DEGREES), math.floor((lon % 360) / GRID_DEGREES)
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+gazetteer = Gazetteer(os.environ.get("GAZETTEER_PATH", DEFAULT_PATH))
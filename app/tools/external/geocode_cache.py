@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    query_key TEXT PRIMARY KEY,
+    place TEXT,
+    lat REAL,
+    lon REAL,
+    expires_at REAL NOT NULL
+);
+"""
+
+_PUNCTUATION = re.compile(r"[^\w,]+")
+_COMMAS = re.compile(r"\s*,\s*")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical cache key for a free-text location.
+
+    Case, surrounding/duplicate whitespace, punctuation and diacritics are
+    ignored, so "  São Paulo,Brazil " and "sao paulo, brazil" share a key.
+    """
+    decomposed = unicodedata.normalize("NFKD", query)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    text = _PUNCTUATION.sub(" ", stripped.casefold())
+    text = _COMMAS.sub(", ", " ".join(text.split()))
+    return text.strip(" ,")
+
+
+@dataclass(frozen=True)
+class GeocodeEntry:
+    """A cached geocoding outcome; `place` is None for a cached "not found"."""
+    place: Optional[str]
+    lat: Optional[float]
+    lon: Optional[float]
+
+    @property
+    def found(self) -> bool:
+        return self.place is not None
+
+
+class GeocodeCache:
+    """Persistent geocoding cache: an in-process LRU in front of a SQLite table.
+
+    The SQLite file (WAL mode) is shared by every worker on the node and
+    survives restarts, so popular destinations never hit Nominatim (or its
+    1 req/s throttle) twice.  Queries that Nominatim could not resolve are
+    cached too, with a shorter TTL, so typos do not repeatedly cost a round-trip.
+    The file is opened on first use, so constructing the cache (e.g. at
+    import time) touches nothing on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl_seconds: float = 30 * 24 * 3600,
+        negative_ttl_seconds: float = 24 * 3600,
+        memory_entries: int = 4096,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._memory: OrderedDict[str, tuple[GeocodeEntry, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[GeocodeEntry]:
+        """Return the cached outcome for *query*, or None on a miss/expired entry."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and cached[1] <= now:
+                # Another worker may have refreshed the row since we read it.
+                cached = None
+            if cached is None:
+                row = self._connection().execute(
+                    "SELECT place, lat, lon, expires_at FROM geocode WHERE query_key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    cached = (GeocodeEntry(row[0], row[1], row[2]), row[3])
+                    self._remember(key, cached)
+            else:
+                self._memory.move_to_end(key)
+
+            if cached is None or cached[1] <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return cached[0]
+
+    def put(self, query: str, place: str, lat: float, lon: float) -> None:
+        self._store(query, GeocodeEntry(place, lat, lon), self.ttl_seconds)
+
+    def put_not_found(self, query: str) -> None:
+        self._store(query, GeocodeEntry(None, None, None), self.negative_ttl_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+            return {
+                "entries": entries,
+                "memory_entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, query: str, entry: GeocodeEntry, ttl: float) -> None:
+        key = normalize_query(query)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO geocode (query_key, place, lat, lon, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, entry.place, entry.lat, entry.lon, expires_at),
+            )
+            self._remember(key, (entry, expires_at))
+
+    def _connection(self) -> sqlite3.Connection:
+        """The SQLite connection, opened (and the schema created) on first use; call with the lock held."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, cached: tuple[GeocodeEntry, float]) -> None:
+        self._memory[key] = cached
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "TravelAssistant/1.0"
+
+HTTP_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.environ.get("HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=30.0,
+)
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`httpx[http2]`)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+HTTP2 = _http2_available()
+
+
+def _client_kwargs() -> dict:
+    return {
+        "timeout": HTTP_TIMEOUT,
+        "limits": HTTP_LIMITS,
+        "http2": HTTP2,
+        "headers": {"User-Agent": USER_AGENT, "Accept": "application/json"},
+    }
+
+
+def get_client() -> httpx.Client:
+    """Shared pooled sync client (used by the sync tool path)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(**_client_kwargs())
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared pooled async client; created lazily inside the running event loop."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                logger.info("Creating async HTTP client (http2=%s, limits=%s)", HTTP2, HTTP_LIMITS)
+                _async_client = httpx.AsyncClient(**_client_kwargs())
+    return _async_client
+
+
+async def aclose() -> None:
+    """Close the shared clients; called from the FastAPI lifespan on shutdown."""
+    global _client, _async_client
+    with _lock:
+        client, async_client = _client, _async_client
+        _client = _async_client = None
+    if async_client is not None:
+        await async_client.aclose()
+    if client is not None:
+        client.close()
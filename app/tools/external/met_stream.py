@@ -0,0 +1,139 @@
+import json
+import re
+from json.scanner import make_scanner
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+_scan_once = make_scanner(json.JSONDecoder())
+_KEY = '"timeseries"'
+_ITEM_KEY = '"time"'
+_SEPARATORS = re.compile(r"[ \t\r\n,]*")
+
+
+class TimeseriesParser:
+    """Incremental parser for the `properties.timeseries` array of a MET Norway response.
+
+    Text is fed as it arrives and only complete array elements are decoded,
+    so the rest of the document (metadata, units, the far end of the
+    forecast) is never turned into Python objects and the caller can fold
+    each element away before the next chunk arrives.  Parsing stops once an
+    element would start a UTC day beyond `max_days`.
+
+    Every element starts with a `"time"` key, so the elements before the last
+    such key in the buffer are complete; they are decoded in one
+    `json.loads` call (one C pass, key strings shared) rather than one call
+    per element.  That boundary is only a hint: if it is wrong the batch
+    fails to parse and the elements are decoded one at a time instead.
+    """
+
+    def __init__(self, max_days: int = 7):
+        self.max_days = max_days
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._in_array = False
+        self._days: set[str] = set()
+
+    def feed(self, text: str) -> List[dict]:
+        """Consume the next chunk of text; returns the elements it completed."""
+        if self.done:
+            return []
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        if not self._in_array and not self._seek_array():
+            return []
+        return self._keep_days(self._decode_complete())
+
+    def close(self) -> List[dict]:
+        """Signal end of input; returns any remaining elements and validates the array was complete."""
+        if not self._in_array:
+            raise ValueError("MET response contains no timeseries")
+        items = [] if self.done else self._keep_days(self._decode_each(len(self._buf)))
+        if not self.done:
+            raise ValueError("MET response ended inside the timeseries")
+        self._buf = ""
+        return items
+
+    def _decode_complete(self) -> List[dict]:
+        """Decode every element that precedes the last element start in the buffer."""
+        buf, pos = self._buf, _SEPARATORS.match(self._buf, self._pos).end()
+        last_key = buf.rfind(_ITEM_KEY, pos)
+        if last_key < 0:
+            return []
+        start = buf.rfind("{", pos, last_key)
+        cut = buf.rfind(",", pos, start)
+        if cut < 0:
+            # At most one element so far; it may still be incomplete.
+            return []
+        try:
+            items = json.loads("[" + buf[pos:cut] + "]")
+        except ValueError:
+            return self._decode_each(start)
+        self._pos = cut + 1
+        return items
+
+    def _decode_each(self, limit: int) -> List[dict]:
+        """Element-by-element fallback, for elements starting before *limit*."""
+        items = []
+        buf, pos = self._buf, self._pos
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos >= limit or buf.startswith("]", pos):
+                break
+            try:
+                item, pos = _scan_once(buf, pos)
+            except (StopIteration, ValueError):
+                break  # element not complete yet
+            items.append(item)
+            self._pos = pos
+        return items
+
+    def _keep_days(self, items: List[dict]) -> List[dict]:
+        """Drop elements past `max_days` distinct UTC dates; marks the parse done at the limit or array end."""
+        for i, item in enumerate(items):
+            day = item.get("time", "")[:10]
+            if day not in self._days:
+                if len(self._days) == self.max_days:
+                    self.done = True
+                    return items[:i]
+                self._days.add(day)
+        if self._buf.startswith("]", _SEPARATORS.match(self._buf, self._pos).end()):
+            self.done = True
+        return items
+
+    def _seek_array(self) -> bool:
+        idx = self._buf.find(_KEY)
+        if idx < 0:
+            # Keep a tail in case the key is split across chunks.
+            self._buf = self._buf[-(len(_KEY) - 1):]
+            return False
+        bracket = self._buf.find("[", idx + len(_KEY))
+        if bracket < 0:
+            self._buf = self._buf[idx:]
+            return False
+        self._in_array = True
+        self._pos = bracket + 1
+        return True
+
+
+def iter_timeseries(chunks: Iterable[str], max_days: int = 7) -> Iterator[dict]:
+    """Yield timeseries elements from streamed text (e.g. `httpx.Response.iter_text()`).
+
+    Once `max_days` are complete the remaining chunks are read but not parsed,
+    so the HTTP connection can go back to the pool instead of being dropped.
+    """
+    parser = TimeseriesParser(max_days)
+    for chunk in chunks:
+        if not parser.done:
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_timeseries(chunks: AsyncIterable[str], max_days: int = 7) -> AsyncIterator[dict]:
+    """Async variant of `iter_timeseries` (e.g. for `httpx.Response.aiter_text()`)."""
+    parser = TimeseriesParser(max_days)
+    async for chunk in chunks:
+        if not parser.done:
+            for item in parser.feed(chunk):
+                yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+from typing import Any, Iterable, List, Mapping
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("json", "compact")
+DEFAULT_FORMAT = os.environ.get("TOOL_OUTPUT_FORMAT", "compact")
+
+
+def output_format(tool_name: str) -> str:
+    """Result encoding for *tool_name*: ``TOOL_OUTPUT_FORMAT_<TOOL_NAME>``, else ``TOOL_OUTPUT_FORMAT``.
+
+    - ``json``: the full Pydantic model as JSON (every field, nulls included).
+    - ``compact``: the tool's compact encoding (short/omitted fields, columnar
+      rows, no nulls, no whitespace).  Tool results are replayed to the model
+      on every later turn of a thread and into the grounding check, so their
+      size is paid many times over.
+    """
+    fmt = os.environ.get(f"TOOL_OUTPUT_FORMAT_{tool_name.upper()}", DEFAULT_FORMAT).lower()
+    if fmt not in FORMATS:
+        logger.warning("Unknown tool output format %r for %s — using json", fmt, tool_name)
+        return "json"
+    return fmt
+
+
+def compact_json(data: Any) -> str:
+    """Serialize *data* without nulls, empty containers or insignificant whitespace."""
+    return json.dumps(_prune(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def columns(rows: Iterable[Mapping[str, Any]], names: List[str]) -> dict:
+    """Lay out *rows* as ``{"cols": names, "rows": [[...], ...]}``; keys are written once, not per row.
+
+    Trailing columns that are null in every row are dropped.
+    """
+    table = [[row.get(name) for name in names] for row in rows]
+    width = len(names)
+    while width and all(r[width - 1] is None for r in table):
+        width -= 1
+    return {"cols": names[:width], "rows": [r[:width] for r in table]}
+
+
+def _prune(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items() if v is not None}
+        return {k: v for k, v in pruned.items() if v != [] and v != {}}
+    if isinstance(value, list):
+        # Nulls inside rows are positional and must stay.
+        return [_prune(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
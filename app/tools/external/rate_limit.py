@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_STATE = struct.Struct("d")
+
+
+class RateLimiter:
+    """Rate limiter (GCRA / token bucket) shared by threads, coroutines and worker processes.
+
+    The only state is the *theoretical arrival time* (TAT) of the next free
+    slot.  Each caller atomically reserves a slot by advancing the TAT one
+    interval and then waits until its own slot comes up, so callers are served
+    in reservation order and nobody spins or holds a lock while waiting.
+
+    With `state_path` the TAT lives in a small file guarded by `fcntl.flock`,
+    so every uvicorn worker on the node draws from the same budget.  Without it
+    (or where `fcntl` is unavailable) the limit is per process.  The file is
+    opened on the first reservation, so constructing a limiter touches nothing
+    on disk.
+    """
+
+    def __init__(self, name: str, interval: float, *, burst: int = 1, state_path: Optional[str] = None):
+        self.name = name
+        self.interval = interval
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tat = 0.0
+        self._fd: Optional[int] = None
+        self._state_path = state_path if fcntl is not None else None
+        if state_path and fcntl is None:
+            logger.warning("fcntl unavailable — rate limiter '%s' is per-process only", name)
+
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def reserve(self) -> float:
+        """Reserve the next slot and return how long to wait (seconds) before using it."""
+        with self._lock:
+            if self._fd is None and self._state_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self._state_path)), exist_ok=True)
+                self._fd = os.open(self._state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            if self._fd is None:
+                now = time.time()
+                wait, self._tat = self._advance(self._tat, now)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                try:
+                    raw = os.pread(self._fd, _STATE.size, 0)
+                    tat = _STATE.unpack(raw)[0] if len(raw) == _STATE.size else 0.0
+                    now = time.time()
+                    wait, self._tat = self._advance(tat, now)
+                    os.pwrite(self._fd, _STATE.pack(self._tat), 0)
+                finally:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.last_wait = wait
+            return wait
+
+    def acquire(self) -> float:
+        """Block the calling thread until a slot is available; returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self._enter()
+            try:
+                time.sleep(wait)
+            finally:
+                self._leave()
+        return wait
+
+    async def aacquire(self) -> float:
+        """Wait for a slot without blocking the event loop; returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self._enter()
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._leave()
+        return wait
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "interval_s": self.interval,
+                "shared": bool(self._state_path),
+                "waiting": self.waiting,
+                "backlog": max(0, int((self._tat - time.time()) / self.interval)),
+                "acquired": self.acquired,
+                "avg_wait_s": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+                "max_wait_s": round(self.max_wait, 3),
+                "last_wait_s": round(self.last_wait, 3),
+            }
+
+    def _advance(self, tat: float, now: float) -> tuple[float, float]:
+        """GCRA step: return (wait, new TAT) for a request arriving at *now*."""
+        tat = max(tat, now)
+        wait = max(0.0, tat - (self.burst - 1) * self.interval - now)
+        return wait, tat + self.interval
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.waiting -= 1
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight wait for the leader's result (or exception) instead
+    of repeating it.  The in-flight call is a `concurrent.futures.Future`, so
+    sync callers (threadpool) and async callers (`asyncio.wrap_future`) can
+    share the same flight.  Nothing is cached once the leader finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Run *fn* once per in-flight *key*; returns ``(result, coalesced)``."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, exc=e)
+            raise
+        self._finish(key, future, result=result)
+        return result, False
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Async variant of `do`.
+
+        The leader's work runs in its own task that every caller, the leader
+        included, awaits through `asyncio.shield`.  Cancelling a caller (a
+        tool deadline, a disconnected stream) only cancels that caller; the
+        work finishes and still settles the flight for everyone else.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.shield(asyncio.wrap_future(future)), True
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._settle(key, future, done))
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executed += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, *, result: Any = None, exc: BaseException | None = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def _settle(self, key: Hashable, future: Future, task: asyncio.Future) -> None:
+        if task.cancelled():
+            # Only loop shutdown cancels the detached work; followers get an ordinary error.
+            self._finish(key, future, exc=RuntimeError(f"In-flight {self.name} call for {key!r} was cancelled"))
+        elif task.exception() is not None:
+            self._finish(key, future, exc=task.exception())
+        else:
+            self._finish(key, future, result=task.result())
@@ -0,0 +1,84 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import timezone, tzinfo
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.tools.external.gazetteer import gazetteer
+
+logger = logging.getLogger(__name__)
+
+# Where the boundary index has no land zone (open ocean, or a zone newer than
+# the installed tzdata) a coordinate takes a bundled place's zone only when it
+# *is* that place: geocoders put a city's centre a few km apart, but further
+# out the nearest bundled city says nothing reliable about the zone.
+ZONE_MATCH_KM = float(os.environ.get("TIMEZONE_MATCH_KM", "20"))
+
+_finder = None
+_finder_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ForecastZone:
+    """Timezone used to bucket a forecast into local calendar days."""
+    name: str
+    tzinfo: tzinfo
+    source: str  # "boundary" | "gazetteer" | "utc"
+
+
+UTC_ZONE = ForecastZone("UTC", timezone.utc, "utc")
+
+
+def _get_finder():
+    """The timezonefinder boundary index, opened on first use (its polygon files are read on demand)."""
+    global _finder
+    if _finder is None:
+        with _finder_lock:
+            if _finder is None:
+                from timezonefinder import TimezoneFinder
+
+                _finder = TimezoneFinder()
+    return _finder
+
+
+def _boundary_zone(lat: float, lon: float) -> Optional[ForecastZone]:
+    name = _get_finder().timezone_at(lng=lon, lat=lat)
+    # Ocean polygons carry nautical "Etc/GMT±N" zones, which are not local days.
+    if not name or name.startswith("Etc/"):
+        return None
+    try:
+        return ForecastZone(name, ZoneInfo(name), "boundary")
+    except ZoneInfoNotFoundError:
+        logger.warning("No tz data for %s at (%.2f, %.2f) — tzdata older than the boundary index?", name, lat, lon)
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _zone_for(lat: float, lon: float) -> ForecastZone:
+    zone = _boundary_zone(lat, lon)
+    if zone is not None:
+        return zone
+    match = gazetteer.nearest(lat, lon, ZONE_MATCH_KM)
+    if match is not None:
+        place, _ = match
+        try:
+            return ForecastZone(place.timezone, ZoneInfo(place.timezone), "gazetteer")
+        except ZoneInfoNotFoundError:
+            logger.warning("No tz data for %s (%s) — using UTC days", place.timezone, place.name)
+    return UTC_ZONE
+
+
+def zone_for(lat: float, lon: float) -> ForecastZone:
+    """Resolve the local timezone of a coordinate offline.
+
+    The timezone-boundary polygons shipped with `timezonefinder` give the IANA
+    zone of any point on land.  A point they leave without one (open ocean,
+    or a zone the installed tzdata lacks) takes the zone of a bundled
+    gazetteer place within `ZONE_MATCH_KM`, as for a coastal city whose
+    centre geocodes just offshore, and otherwise gets UTC days, labelled as
+    such.  Results are cached per ~1 km cell, like the forecast cache.
+    """
+    return _zone_for(round(lat, 2), round(lon, 2))
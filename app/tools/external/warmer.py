@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from app.middleware.event_collector import reset_events
+from app.tools.external.gazetteer import gazetteer
+from app.tools.external.rate_limit import RateLimiter
+from app.tools.external.weather import _afetch_7day_forecast, _ageocode_city, forecast_cache
+
+logger = logging.getLogger(__name__)
+
+# Refresh an entry this long before its MET `Expires` time.
+WARM_REFRESH_LEAD = float(os.environ.get("WARM_REFRESH_LEAD_SECONDS", "120"))
+# Spacing between the warmer's MET requests, shared by all workers on the node.
+WARM_MIN_INTERVAL = float(os.environ.get("WARM_MIN_INTERVAL_SECONDS", "0.5"))
+WARM_CONCURRENCY = int(os.environ.get("WARM_CONCURRENCY", "2"))
+# Upper bound on the sleep between passes, and the backoff after a failure.
+WARM_MAX_SLEEP = 300.0
+WARM_RETRY_AFTER = 120.0
+
+
+@dataclass
+class _Destination:
+    city: str
+    place: Optional[str] = None
+    lat: float = 0.0
+    lon: float = 0.0
+    retry_at: float = 0.0
+
+
+def configured_destinations() -> List[str]:
+    """Destinations to keep warm, from the environment (none by default).
+
+    - ``WARM_DESTINATIONS``: ``;``-separated queries ("Paris, France; Tokyo").
+    - ``WARM_DESTINATIONS_FILE``: one query per line, ``#`` comments allowed.
+    - ``WARM_TOP_CITIES``: the N most populous gazetteer places.
+    """
+    cities = [c.strip() for c in os.environ.get("WARM_DESTINATIONS", "").split(";")]
+    path = os.environ.get("WARM_DESTINATIONS_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            cities += [line.split("#", 1)[0].strip() for line in f]
+    top = int(os.environ.get("WARM_TOP_CITIES", "0"))
+    if top:
+        cities += [place.display_name for place in gazetteer.top(top)]
+    return list(dict.fromkeys(c for c in cities if c))
+
+
+class ForecastWarmer:
+    """Background task that keeps the geocode and forecast caches hot for popular destinations.
+
+    Each destination is geocoded once (gazetteer, geocode cache, or Nominatim
+    through its shared rate limiter), then its forecast is refreshed
+    `WARM_REFRESH_LEAD` seconds before the cached entry's MET `Expires` time.
+    Refreshes are conditional (`If-Modified-Since`), so an unchanged forecast
+    costs a 304, and they go through `forecast_flight`, so a user request for
+    the same city joins the refresh instead of repeating it.  MET requests are
+    spaced by a cross-process `RateLimiter` and at most `WARM_CONCURRENCY`
+    run at once.  Between passes the task sleeps until the next entry is due.
+
+    The forecast cache is per process, so every worker warms its own copy.
+    """
+
+    def __init__(self, cities: List[str], *, lead: float = WARM_REFRESH_LEAD, limiter: Optional[RateLimiter] = None):
+        self.destinations = [_Destination(city) for city in cities]
+        self.lead = lead
+        # Built in `start` so importing this module (or running with nothing to
+        # warm) never touches the limiter's state file.
+        self.limiter = limiter
+        self._task: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(WARM_CONCURRENCY)
+        self.passes = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_pass_s = 0.0
+        self.next_pass_at = 0.0
+
+    def start(self) -> None:
+        if self._task is None and self.destinations:
+            if len(self.destinations) > forecast_cache.max_entries:
+                logger.warning(
+                    "Warming %d destinations but the forecast cache holds %d — entries will be evicted",
+                    len(self.destinations), forecast_cache.max_entries,
+                )
+            if self.limiter is None:
+                self.limiter = RateLimiter(
+                    "forecast_warmer",
+                    WARM_MIN_INTERVAL,
+                    state_path=os.environ.get("WARM_RATE_LIMIT_PATH", ".data/warmer.ratelimit"),
+                )
+            logger.info("Starting forecast warmer for %d destinations", len(self.destinations))
+            self._task = asyncio.create_task(self._run(), name="forecast-warmer")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        resolved = sum(1 for d in self.destinations if d.place is not None)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "destinations": len(self.destinations),
+            "resolved": resolved,
+            "passes": self.passes,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_pass_s": round(self.last_pass_s, 3),
+            "next_pass_in_s": round(max(0.0, self.next_pass_at - time.time()), 1),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            start = time.time()
+            try:
+                await asyncio.gather(*(self._warm(d) for d in self._due(start)))
+            except Exception:
+                logger.exception("Forecast warmer pass failed")
+            self.passes += 1
+            self.last_pass_s = time.time() - start
+            self.next_pass_at = self._next_due()
+            await asyncio.sleep(max(1.0, self.next_pass_at - time.time()))
+
+    def _due(self, now: float) -> List[_Destination]:
+        due = []
+        for d in self.destinations:
+            if now < d.retry_at:
+                continue
+            entry = forecast_cache.get(forecast_cache.key(d.lat, d.lon)) if d.place else None
+            if entry is None or not entry.fresh_for(self.lead):
+                due.append(d)
+        return due
+
+    def _next_due(self) -> float:
+        now = time.time()
+        due_at = now + WARM_MAX_SLEEP
+        for d in self.destinations:
+            if d.retry_at > now:
+                due_at = min(due_at, d.retry_at)
+                continue
+            entry = forecast_cache.get(forecast_cache.key(d.lat, d.lon)) if d.place else None
+            due_at = min(due_at, entry.expires_at - self.lead if entry else now)
+        return due_at
+
+    async def _warm(self, d: _Destination) -> None:
+        async with self._slots:
+            # Events from background refreshes belong to no request.
+            reset_events()
+            try:
+                if d.place is None:
+                    d.place, d.lat, d.lon = await _ageocode_city(d.city)
+                await self.limiter.aacquire()
+                await _afetch_7day_forecast(d.place, d.lat, d.lon, refresh_within=self.lead)
+            except Exception as e:
+                self.failures += 1
+                d.retry_at = time.time() + WARM_RETRY_AFTER
+                logger.warning("Forecast warmer could not refresh %s: %s", d.city, e)
+                return
+            self.refreshes += 1
+
+
+warmer = ForecastWarmer(configured_destinations())
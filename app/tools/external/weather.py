@@ -1,28 +1,63 @@
+import asyncio
+import contextvars
 import logging
-import time
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone, tzinfo
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
 import httpx
-from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
 
+from app.middleware.event_collector import emit_event
+from app.tools.external.forecast_cache import CachedForecast, CoordKey, ForecastCache
+from app.tools.external.gazetteer import gazetteer
+from app.tools.external.geocode_cache import GeocodeCache, normalize_query
+from app.tools.external.http_client import get_async_client, get_client
+from app.tools.external.met_aggregate import DailyAggregator
+from app.tools.external.met_stream import aiter_timeseries, iter_timeseries
+from app.tools.external.output_format import columns, compact_json, output_format
+from app.tools.external.rate_limit import RateLimiter
+from app.tools.external.singleflight import SingleFlight
+from app.tools.external.timezones import zone_for
+
 logger = logging.getLogger(__name__)
 
-USER_AGENT = "TravelAssistant/1.0"
-_last_geocode = 0.0
+GEOCODE_MIN_INTERVAL = 1.05
+MAX_BATCH_CITIES = 8
+FORECAST_DAYS = 7
+COMPACT_DAY_COLUMNS = ["date", "tmin_c", "tmax_c", "tmean_c", "precip_mm", "wind_max_ms", "symbol"]
+# Local days east of UTC end up to a day later than UTC days; parse one extra.
+STREAM_UTC_DAYS = FORECAST_DAYS + 1
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+MET_FORECAST_URL = "https://api.met.no/weatherapi/locationforecast/2.0/compact"
 
-_http_client = httpx.Client(
-    timeout=15.0,
-    headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+forecast_cache = ForecastCache()
+geocode_cache = GeocodeCache(os.environ.get("GEOCODE_CACHE_PATH", ".data/geocode.sqlite3"))
+nominatim_limiter = RateLimiter(
+    "nominatim",
+    GEOCODE_MIN_INTERVAL,
+    state_path=os.environ.get("NOMINATIM_RATE_LIMIT_PATH", ".data/nominatim.ratelimit"),
 )
+geocode_flight = SingleFlight("geocode")
+forecast_flight = SingleFlight("forecast")
 
 
 class ForecastDay(BaseModel):
-    """One day of forecast aggregated in UTC."""
-    date_utc: str = Field(..., description="Date in UTC, ISO format YYYY-MM-DD.")
+    """One day of forecast aggregated over the destination's local calendar day."""
+    date: str = Field(..., description="Local date at the destination (see `timezone`), ISO format YYYY-MM-DD.")
     tmin_c: float = Field(..., description="Minimum air temperature (°C) observed in the day's timeseries.")
     tmax_c: float = Field(..., description="Maximum air temperature (°C) observed in the day's timeseries.")
+    tmean_c: float = Field(..., description="Mean air temperature (°C) over the day's timeseries points.")
+    precip_mm: Optional[float] = Field(None, description="Total forecast precipitation (mm) for the day.")
+    wind_max_ms: Optional[float] = Field(None, description="Highest forecast wind speed (m/s) during the day.")
+    symbol: Optional[str] = Field(
+        None,
+        description="Dominant MET weather symbol for the day (e.g. 'clearsky', 'partlycloudy', 'rain', 'snow'), "
+        "by forecast hours covered.",
+    )
 
 
 class WeatherForecastResult(BaseModel):
@@ -38,83 +73,358 @@ class WeatherForecastResult(BaseModel):
     place: Optional[str] = Field(None, description="Resolved display name from geocoding.")
     lat: Optional[float] = Field(None, description="Resolved latitude.")
     lon: Optional[float] = Field(None, description="Resolved longitude.")
-    timezone: str = Field("UTC", description="Forecast aggregation timezone. This tool aggregates by UTC date.")
-    days: List[ForecastDay] = Field(default_factory=list, description="Up to 7 days of daily min/max temps.")
+    timezone: str = Field(
+        "UTC",
+        description="Timezone whose local dates the days are aggregated by: the place's IANA name, or "
+        "'UTC' when no zone is known offline (open ocean).",
+    )
+    days: List[ForecastDay] = Field(default_factory=list, description="Up to 7 days of daily temperatures, precipitation, wind and conditions.")
     error: Optional[str] = Field(None, description="Error message when ok=False.")
 
 
-def _geocode_city(city: str) -> Tuple[str, float, float]:
-    """
-    Resolve a free-text location (e.g. "Paris", "Tel Aviv, Israel") into coordinates.
+class WeatherForecastBatchResult(BaseModel):
+    """Structured result of `get_weather_forecasts`: one entry per requested city, in input order."""
+    results: List[WeatherForecastResult] = Field(default_factory=list, description="Per-city forecast results.")
 
-    Uses the public Nominatim instance (OpenStreetMap).
-    This function includes a very small throttle (~1 request/second) to be polite.
-    """
-    global _last_geocode
 
-    elapsed = time.monotonic() - _last_geocode
-    if elapsed < 1.05:
-        time.sleep(1.05 - elapsed)
-    _last_geocode = time.monotonic()
+def _gazetteer_geocode(city: str) -> Optional[Tuple[str, float, float]]:
+    """Resolve *city* from the bundled offline gazetteer; None when unknown or ambiguous."""
+    place, status = gazetteer.resolve(city)
+    stats = gazetteer.stats()
+    if place is None:
+        logger.info("Gazetteer could not resolve %s (%s) — falling back to Nominatim", city, status)
+        emit_event(
+            middleware="gazetteer",
+            status=status,
+            message=f"Gazetteer {status} for '{city}' — falling back to Nominatim",
+            details={"hits": stats["hits"], "fallbacks": stats["fallbacks"]},
+        )
+        return None
+    logger.info("Gazetteer %s match for %s: %s", status, city, place.display_name)
+    emit_event(
+        middleware="gazetteer",
+        status="hit",
+        message=f"Resolved '{city}' offline to {place.display_name}",
+        details={"match": status, "hits": stats["hits"], "fallbacks": stats["fallbacks"]},
+    )
+    return place.display_name, place.lat, place.lon
+
 
-    logger.info("Geocoding city: %s", city)
-    r = _http_client.get(
-        "https://nominatim.openstreetmap.org/search",
-        params={"q": city, "format": "jsonv2", "limit": 1},
+def _cached_geocode(city: str) -> Optional[Tuple[str, float, float]]:
+    """Serve *city* from `geocode_cache`; raises ValueError for a cached "not found"."""
+    entry = geocode_cache.get(city)
+    if entry is None:
+        return None
+    logger.info("Geocode cache hit for %s", city)
+    emit_event(
+        middleware="geocode_cache",
+        status="hit",
+        message=f"Geocode cache hit for '{city}'",
+        details={"found": entry.found, "hits": geocode_cache.hits, "misses": geocode_cache.misses},
     )
-    r.raise_for_status()
-    results = r.json()
+    if not entry.found:
+        raise ValueError(f"Could not find '{city}'. Try 'City, Country' (e.g. 'Paris, France').")
+    return entry.place, entry.lat, entry.lon
+
 
+def _parse_geocode_response(city: str, results: list) -> Tuple[str, float, float]:
+    """Parse a Nominatim response and record the outcome (found or not) in `geocode_cache`."""
     if not results:
+        geocode_cache.put_not_found(city)
         raise ValueError(f"Could not find '{city}'. Try 'City, Country' (e.g. 'Paris, France').")
 
     top = results[0]
-    return top.get("display_name", city), float(top["lat"]), float(top["lon"])
+    resolved = top.get("display_name", city), float(top["lat"]), float(top["lon"])
+    geocode_cache.put(city, *resolved)
+    return resolved
 
 
-def _fetch_7day_forecast(place: str, lat: float, lon: float) -> List[ForecastDay]:
+def _record_coalesced(flight: SingleFlight, key) -> None:
+    stats = flight.stats()
+    logger.info("Coalesced %s lookup for %s onto an in-flight call", flight.name, key)
+    emit_event(
+        middleware="singleflight",
+        status="coalesced",
+        message=f"Joined in-flight {flight.name} lookup for {key}",
+        details={"flight": flight.name, **stats},
+    )
+
+
+def _nominatim_geocode(city: str) -> Tuple[str, float, float]:
+    cached = _cached_geocode(city)
+    if cached is not None:
+        return cached
+
+    nominatim_limiter.acquire()
+
+    logger.info("Geocoding city: %s", city)
+    r = get_client().get(
+        NOMINATIM_URL,
+        params={"q": city, "format": "jsonv2", "limit": 1},
+    )
+    r.raise_for_status()
+    return _parse_geocode_response(city, r.json())
+
+
+async def _anominatim_geocode(city: str) -> Tuple[str, float, float]:
+    cached = _cached_geocode(city)
+    if cached is not None:
+        return cached
+
+    await nominatim_limiter.aacquire()
+
+    logger.info("Geocoding city: %s", city)
+    r = await get_async_client().get(
+        NOMINATIM_URL,
+        params={"q": city, "format": "jsonv2", "limit": 1},
+    )
+    r.raise_for_status()
+    return _parse_geocode_response(city, r.json())
+
+
+def _geocode_city(city: str) -> Tuple[str, float, float]:
+    """
+    Resolve a free-text location (e.g. "Paris", "Tel Aviv, Israel") into coordinates.
+
+    Major cities resolve from the bundled offline `gazetteer`; other queries
+    are answered from the persistent `geocode_cache` when possible, otherwise
+    from the public Nominatim instance (OpenStreetMap) behind a small throttle
+    (~1 request/second, shared by every worker on the node) to be polite.
+    Concurrent lookups of the same normalized query share one call.
+    """
+    resolved = _gazetteer_geocode(city)
+    if resolved is not None:
+        return resolved
+
+    key = normalize_query(city)
+    resolved, coalesced = geocode_flight.do(key, lambda: _nominatim_geocode(city))
+    if coalesced:
+        _record_coalesced(geocode_flight, key)
+    return resolved
+
+
+async def _ageocode_city(city: str) -> Tuple[str, float, float]:
+    """Async variant of `_geocode_city`; waits for its throttle slot without blocking the loop."""
+    resolved = _gazetteer_geocode(city)
+    if resolved is not None:
+        return resolved
+
+    key = normalize_query(city)
+    resolved, coalesced = await geocode_flight.ado(key, lambda: _anominatim_geocode(city))
+    if coalesced:
+        _record_coalesced(geocode_flight, key)
+    return resolved
+
+
+def _forecast_days(aggregator: DailyAggregator) -> List[ForecastDay]:
+    return [
+        ForecastDay(
+            date=d.date,
+            tmin_c=d.tmin,
+            tmax_c=d.tmax,
+            tmean_c=d.tmean,
+            precip_mm=d.precip_mm,
+            wind_max_ms=d.wind_max_ms,
+            symbol=d.symbol,
+        )
+        for d in aggregator.daily(FORECAST_DAYS)
+    ]
+
+
+def _aggregate_timeseries(timeseries: Iterable[dict], tz: tzinfo = timezone.utc) -> List[ForecastDay]:
     """
-    Fetch MET Norway compact forecast and aggregate into daily min/max temperatures.
+    Aggregate MET Norway timeseries points into daily forecast stats.
 
     Aggregation:
-    - Groups forecast points by UTC date (YYYY-MM-DD).
-    - Computes min/max of `air_temperature` for each day.
+    - Groups forecast points by local date in *tz* (YYYY-MM-DD).
+    - Computes min/max/mean of `air_temperature`, the precipitation total, the max `wind_speed`
+      and the dominant weather symbol for each day.
     - Returns up to the first 7 available days.
+
+    Points are bucketed one by one as they arrive (`met_aggregate.DailyAggregator`).
+    """
+    aggregator = DailyAggregator(tz)
+    aggregator.extend(timeseries)
+    return _forecast_days(aggregator)
+
+
+def _forecast_cache_lookup(
+    lat: float, lon: float, refresh_within: float = 0.0
+) -> Tuple[CoordKey, Optional[CachedForecast], Dict[str, str]]:
+    """Return the cache key, any cached entry, and the conditional request headers to send.
+
+    An entry expiring within *refresh_within* seconds is revalidated as if already stale.
     """
-    logger.info("Fetching forecast for %s (%.4f, %.4f)", place, lat, lon)
-    r = _http_client.get(
-        "https://api.met.no/weatherapi/locationforecast/2.0/compact",
-        params={"lat": lat, "lon": lon},
+    key = forecast_cache.key(lat, lon)
+    entry = forecast_cache.get(key)
+    headers = {}
+    if entry is not None and not entry.fresh_for(refresh_within) and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return key, entry, headers
+
+
+def _record_forecast_cache(outcome: str, key: CoordKey) -> None:
+    forecast_cache.record(outcome)
+    stats = forecast_cache.stats()
+    logger.info("Forecast cache %s for %s (hits=%d, misses=%d)", outcome, key, stats["hits"], stats["misses"])
+    emit_event(
+        middleware="forecast_cache",
+        status=outcome,
+        message=f"Forecast cache {outcome} for {key[0]}, {key[1]}",
+        details={"key": list(key), **stats},
     )
+
+
+def _revalidated_days(key: CoordKey, entry: Optional[CachedForecast], r: httpx.Response) -> Optional[List[ForecastDay]]:
+    """Serve a 304 from the cached days; None when the response carries a new forecast."""
+    if r.status_code == 304 and entry is not None:
+        forecast_cache.revalidated(key, entry, r.headers)
+        _record_forecast_cache("revalidated", key)
+        return entry.days
     r.raise_for_status()
+    return None
+
+
+def _store_forecast(key: CoordKey, days: List[ForecastDay], headers: Mapping[str, str]) -> List[ForecastDay]:
+    forecast_cache.store(key, days, headers)
+    _record_forecast_cache("miss", key)
+    return days
+
+
+def _fetch_7day_forecast(place: str, lat: float, lon: float) -> List[ForecastDay]:
+    """
+    Fetch MET Norway compact forecast (through `forecast_cache`) and aggregate into daily forecast stats.
+
+    The body is parsed incrementally as it arrives (`met_stream`) and only the
+    UTC days covering the first `FORECAST_DAYS` local days are decoded.  Concurrent fetches for the
+    same rounded coordinate share one request.
+    """
+    key, entry, headers = _forecast_cache_lookup(lat, lon)
+    if entry is not None and entry.fresh:
+        _record_forecast_cache("hit", key)
+        return entry.days
+
+    def fetch() -> List[ForecastDay]:
+        logger.info("Fetching forecast for %s (%.4f, %.4f)", place, lat, lon)
+        params = {"lat": key[0], "lon": key[1]}
+        with get_client().stream("GET", MET_FORECAST_URL, params=params, headers=headers) as r:
+            days = _revalidated_days(key, entry, r)
+            if days is None:
+                timeseries = iter_timeseries(r.iter_text(), STREAM_UTC_DAYS)
+                days = _aggregate_timeseries(timeseries, zone_for(lat, lon).tzinfo)
+                days = _store_forecast(key, days, r.headers)
+            return days
+
+    days, coalesced = forecast_flight.do(key, fetch)
+    if coalesced:
+        _record_coalesced(forecast_flight, key)
+    return days
+
 
-    timeseries = r.json()["properties"]["timeseries"]
+async def _afetch_7day_forecast(place: str, lat: float, lon: float, refresh_within: float = 0.0) -> List[ForecastDay]:
+    """Async variant of `_fetch_7day_forecast`; *refresh_within* lets the warmer refresh ahead of `Expires`."""
+    key, entry, headers = _forecast_cache_lookup(lat, lon, refresh_within)
+    if entry is not None and entry.fresh_for(refresh_within):
+        _record_forecast_cache("hit", key)
+        return entry.days
 
-    daily: Dict[str, List[float]] = {}
-    for item in timeseries:
-        day = (
-            datetime.fromisoformat(item["time"].replace("Z", "+00:00"))
-            .astimezone(timezone.utc)
-            .date()
-            .isoformat()
+    async def fetch() -> List[ForecastDay]:
+        logger.info("Fetching forecast for %s (%.4f, %.4f)", place, lat, lon)
+        params = {"lat": key[0], "lon": key[1]}
+        async with get_async_client().stream("GET", MET_FORECAST_URL, params=params, headers=headers) as r:
+            days = _revalidated_days(key, entry, r)
+            if days is None:
+                aggregator = DailyAggregator(zone_for(lat, lon).tzinfo)
+                async for item in aiter_timeseries(r.aiter_text(), STREAM_UTC_DAYS):
+                    aggregator.add(item)
+                days = _store_forecast(key, _forecast_days(aggregator), r.headers)
+            return days
+
+    days, coalesced = await forecast_flight.ado(key, fetch)
+    if coalesced:
+        _record_coalesced(forecast_flight, key)
+    return days
+
+
+def _error_result(city: str, exc: Exception) -> WeatherForecastResult:
+    """Map a geocoding/forecast failure to a user-safe tool result."""
+    if isinstance(exc, httpx.TimeoutException):
+        return WeatherForecastResult(
+            ok=False, query=city, error=f"Timeout while fetching forecast for '{city}'."
         )
-        temp = item["data"]["instant"]["details"].get("air_temperature")
-        if isinstance(temp, (int, float)):
-            if day not in daily:
-                daily[day] = [float(temp), float(temp)]
-            else:
-                daily[day][0] = min(daily[day][0], float(temp))
-                daily[day][1] = max(daily[day][1], float(temp))
-
-    days = sorted(daily.keys())[:7]
-    return [
-        ForecastDay(date_utc=d, tmin_c=daily[d][0], tmax_c=daily[d][1])
-        for d in days
-    ]
+    if isinstance(exc, ValueError):
+        return WeatherForecastResult(ok=False, query=city, error=str(exc))
+    logger.error("Unexpected error in get_weather_forecast for '%s'", city, exc_info=exc)
+    return WeatherForecastResult(
+        ok=False, query=city, error=f"Unexpected error: {exc}"
+    )
+
+
+def _forecast_for(city: str) -> WeatherForecastResult:
+    try:
+        place, lat, lon = _geocode_city(city)
+        forecast_days = _fetch_7day_forecast(place, lat, lon)
+        return WeatherForecastResult(
+            ok=True,
+            query=city,
+            place=place,
+            lat=lat,
+            lon=lon,
+            timezone=zone_for(lat, lon).name,
+            days=forecast_days,
+        )
+    except Exception as e:
+        return _error_result(city, e)
+
+
+async def _aforecast_for(city: str) -> WeatherForecastResult:
+    try:
+        place, lat, lon = await _ageocode_city(city)
+        forecast_days = await _afetch_7day_forecast(place, lat, lon)
+        return WeatherForecastResult(
+            ok=True,
+            query=city,
+            place=place,
+            lat=lat,
+            lon=lon,
+            timezone=zone_for(lat, lon).name,
+            days=forecast_days,
+        )
+    except Exception as e:
+        return _error_result(city, e)
+
+
+def _short_place(place: Optional[str]) -> Optional[str]:
+    """"Paris, Ile-de-France, Metropolitan France, France" -> "Paris, France"."""
+    if not place:
+        return place
+    parts = [p.strip() for p in place.split(",") if p.strip()]
+    return parts[0] if len(parts) == 1 else f"{parts[0]}, {parts[-1]}"
+
+
+def _compact_result(result: WeatherForecastResult) -> dict:
+    """Compact encoding: no coordinates, shortened place, days as a column table."""
+    if not result.ok:
+        return {"ok": False, "query": result.query, "error": result.error}
+    return {
+        "ok": True,
+        "query": result.query,
+        "place": _short_place(result.place),
+        "timezone": result.timezone,
+        "days": columns((d.model_dump() for d in result.days), COMPACT_DAY_COLUMNS),
+    }
+
 
+def _encode(result: BaseModel, fmt: str) -> str:
+    """Serialize a tool result as "json" (full model) or "compact" (see `output_format`)."""
+    if fmt == "json":
+        return result.model_dump_json()
+    if isinstance(result, WeatherForecastBatchResult):
+        return compact_json({"results": [_compact_result(r) for r in result.results]})
+    return compact_json(_compact_result(result))
 
-@tool
-def get_weather_forecast(city: str) -> str:
+
+def _get_weather_forecast(city: str) -> str:
     """
     Get a simple 7-day weather forecast for a city (NO API KEY required).
 
@@ -127,41 +437,90 @@ def get_weather_forecast(city: str) -> str:
       Prefer "City, Country" when ambiguous (e.g., "Paris, France" vs "Paris, Texas").
 
     What this tool does:
-    1) Geocodes the input string to latitude/longitude using OpenStreetMap Nominatim.
+    1) Geocodes the input string to latitude/longitude using a bundled gazetteer of major
+       cities, falling back to OpenStreetMap Nominatim.
     2) Fetches forecast data from MET Norway (locationforecast).
-    3) Aggregates forecast points by UTC date and returns up to 7 days of min/max temperatures.
+    3) Aggregates forecast points by the destination's local date (timezone resolved offline)
+       and returns up to 7 days of min/max/mean temperatures, precipitation, max wind and the
+       dominant weather symbol.
 
     Output (machine-readable):
-    - Returns a JSON object matching `WeatherForecastResult`.
+    - Returns a JSON object (compact form of `WeatherForecastResult`).
       On success:
         - ok=true
-        - place/lat/lon are set
-        - days contains up to 7 entries with {date_utc, tmin_c, tmax_c}
+        - place and timezone are set
+        - days is a table: days.cols names the columns
+          (date, tmin_c, tmax_c, tmean_c, precip_mm, wind_max_ms, symbol)
+          and days.rows holds one row per day, up to 7
       On failure:
         - ok=false
         - error contains a user-safe explanation
     """
-    try:
-        place, lat, lon = _geocode_city(city)
-        forecast_days = _fetch_7day_forecast(place, lat, lon)
-        result = WeatherForecastResult(
-            ok=True,
+    return _encode(_forecast_for(city), output_format("get_weather_forecast"))
+
+
+async def _aget_weather_forecast(city: str) -> str:
+    """Async implementation of `get_weather_forecast` (same contract as the sync one)."""
+    return _encode(await _aforecast_for(city), output_format("get_weather_forecast"))
+
+
+def _split_batch(cities: List[str]) -> Tuple[List[str], List[WeatherForecastResult]]:
+    """Cities to look up, plus error results for any beyond `MAX_BATCH_CITIES`."""
+    overflow = [
+        WeatherForecastResult(
+            ok=False,
             query=city,
-            place=place,
-            lat=lat,
-            lon=lon,
-            days=forecast_days,
-        )
-    except httpx.TimeoutException:
-        result = WeatherForecastResult(
-            ok=False, query=city, error=f"Timeout while fetching forecast for '{city}'."
-        )
-    except ValueError as e:
-        result = WeatherForecastResult(ok=False, query=city, error=str(e))
-    except Exception as e:
-        logger.exception("Unexpected error in get_weather_forecast for '%s'", city)
-        result = WeatherForecastResult(
-            ok=False, query=city, error=f"Unexpected error: {e}"
+            error=f"Too many cities in one request (max {MAX_BATCH_CITIES}); ask for this one separately.",
         )
+        for city in cities[MAX_BATCH_CITIES:]
+    ]
+    return cities[:MAX_BATCH_CITIES], overflow
 
-    return result.model_dump_json()
+
+def _get_weather_forecasts(cities: List[str]) -> str:
+    """
+    Get simple 7-day weather forecasts for several cities at once (NO API KEY required).
+
+    When to use:
+    - The user compares or plans a trip across 2 or more named places in the next 7 days.
+    - Examples: "Lisbon vs Barcelona vs Rome next week", "Weather for my Tokyo → Kyoto → Osaka trip".
+    - For a single place, use `get_weather_forecast` instead.
+
+    Input:
+    - cities: A list of human-readable location strings (at most 8).
+      Prefer "City, Country" when ambiguous (e.g., "Paris, France" vs "Paris, Texas").
+
+    What this tool does:
+    - Runs the same lookup as `get_weather_forecast` for every city concurrently,
+      so the whole batch costs roughly one lookup's latency.
+
+    Output (machine-readable):
+    - Returns a JSON object: `results` holds one result per input city, in input order,
+      each shaped like a `get_weather_forecast` result. Each result has its own
+      ok/error, so one failed city does not hide the others.
+    """
+    cities, overflow = _split_batch(cities)
+    with ThreadPoolExecutor(max_workers=max(1, len(cities))) as pool:
+        # Each lookup runs in a copy of the caller's context so middleware events still reach the request.
+        futures = [pool.submit(contextvars.copy_context().run, _forecast_for, city) for city in cities]
+        results = [f.result() for f in futures]
+    return _encode(WeatherForecastBatchResult(results=results + overflow), output_format("get_weather_forecasts"))
+
+
+async def _aget_weather_forecasts(cities: List[str]) -> str:
+    """Async implementation of `get_weather_forecasts` (same contract as the sync one)."""
+    cities, overflow = _split_batch(cities)
+    results = await asyncio.gather(*(_aforecast_for(city) for city in cities))
+    return _encode(WeatherForecastBatchResult(results=list(results) + overflow), output_format("get_weather_forecasts"))
+
+
+get_weather_forecast = StructuredTool.from_function(
+    func=_get_weather_forecast,
+    coroutine=_aget_weather_forecast,
+    name="get_weather_forecast",
+)
+get_weather_forecasts = StructuredTool.from_function(
+    func=_get_weather_forecasts,
+    coroutine=_aget_weather_forecasts,
+    name="get_weather_forecasts",
+)
@@ -0,0 +1,134 @@
+"""Daily aggregation benchmark: the original per-point loop vs. the shipped aggregator.
+
+Compares, on already-parsed MET timeseries points:
+
+- ``loop``:      the original aggregation — ``datetime.fromisoformat(...)
+                 .astimezone(utc).date().isoformat()`` and a dict update per
+                 point (min/max only).
+- ``loop-full``: the same per-point loop computing everything the forecast
+                 now reports (local days, mean, precipitation, max wind,
+                 dominant symbol).
+- ``aggregator``: ``met_aggregate.DailyAggregator`` — the per-point loop the
+                 forecast ships, fed point by point from the streaming parser
+                 and tolerant of missing or non-numeric values.
+
+At forecast sizes (~90 points over 7 days) the cost is the per-point
+timestamp parse and dict work; bulk per-day reductions (epoch arrays,
+bisection, column slices) measured no faster than ``loop-full`` and were
+dropped.
+
+Without ``--fixture`` a synthetic payload with MET's compact shape is used;
+record real responses with ``python -m benchmarks.fixtures``.
+
+Usage:
+    python -m benchmarks.aggregation --fixture benchmarks/fixtures/paris.json --tz Europe/Paris
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone, tzinfo
+from functools import partial
+from zoneinfo import ZoneInfo
+
+from app.tools.external.met_aggregate import DailyAggregator
+from benchmarks.fixtures import load_payload
+
+FORECAST_DAYS = 7
+
+
+def _loop(timeseries: list[dict]) -> list[tuple]:
+    daily = {}
+    for item in timeseries:
+        day = (
+            datetime.fromisoformat(item["time"].replace("Z", "+00:00"))
+            .astimezone(timezone.utc)
+            .date()
+            .isoformat()
+        )
+        temp = item["data"]["instant"]["details"].get("air_temperature")
+        if isinstance(temp, (int, float)):
+            if day not in daily:
+                daily[day] = [float(temp), float(temp)]
+            else:
+                daily[day][0] = min(daily[day][0], float(temp))
+                daily[day][1] = max(daily[day][1], float(temp))
+    return [(d, daily[d][0], daily[d][1]) for d in sorted(daily)[:FORECAST_DAYS]]
+
+
+def _loop_full(timeseries: list[dict], tz: tzinfo = timezone.utc) -> list[tuple]:
+    daily = {}
+    for item in timeseries:
+        day = datetime.fromisoformat(item["time"].replace("Z", "+00:00")).astimezone(tz).date().isoformat()
+        data = item["data"]
+        details = data["instant"]["details"]
+        period, span = data.get("next_1_hours"), 1
+        if not period:
+            period, span = data.get("next_6_hours"), 6
+        acc = daily.setdefault(day, {"temps": [], "winds": [], "precip": [], "symbols": {}})
+        acc["temps"].append(details["air_temperature"])
+        acc["winds"].append(details["wind_speed"])
+        if period:
+            acc["precip"].append(period["details"]["precipitation_amount"])
+            symbol = period["summary"]["symbol_code"].split("_", 1)[0]
+            acc["symbols"][symbol] = acc["symbols"].get(symbol, 0) + span
+    return [
+        (
+            d,
+            min(acc["temps"]),
+            max(acc["temps"]),
+            round(sum(acc["temps"]) / len(acc["temps"]), 1),
+            round(sum(acc["precip"]), 1),
+            max(acc["winds"]),
+            max(acc["symbols"], key=acc["symbols"].__getitem__),
+        )
+        for d, acc in sorted(daily.items())[:FORECAST_DAYS]
+    ]
+
+
+def _aggregator(timeseries: list[dict], tz: tzinfo = timezone.utc) -> list[tuple]:
+    aggregator = DailyAggregator(tz)
+    aggregator.extend(timeseries)
+    return [
+        (d.date, d.tmin, d.tmax, d.tmean, d.precip_mm, d.wind_max_ms, d.symbol)
+        for d in aggregator.daily(FORECAST_DAYS)
+    ]
+
+
+def _us_per_call(fn, timeseries, repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(timeseries)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", action="append", help="Recorded MET response (repeatable).")
+    parser.add_argument("--tz", default="UTC", help="IANA zone whose local days are aggregated (full engines).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+
+    for path in args.fixture or [None]:
+        timeseries = json.loads(load_payload(path))["properties"]["timeseries"]
+        assert _loop(timeseries) == [day[:3] for day in _aggregator(timeseries)], "aggregations disagree"
+        tz = ZoneInfo(args.tz)
+        loop_full, aggregator = partial(_loop_full, tz=tz), partial(_aggregator, tz=tz)
+        assert loop_full(timeseries) == aggregator(timeseries), "aggregations disagree"
+
+        print(f"fixture: {path or 'synthetic'} ({len(timeseries)} points, local days in {args.tz})")
+        print(f"{'engine':>10} {'us/call':>9}")
+        baseline = None
+        for name, fn in (("loop", _loop), ("loop-full", loop_full), ("aggregator", aggregator)):
+            us = _us_per_call(fn, timeseries, args.repeat, args.number)
+            baseline = baseline or us
+            print(f"{name:>10} {us:>9.1f}  ({baseline / us:.2f}x)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Concurrency benchmark for the ``/completions`` endpoint.
+
+Measures requests/second as the number of in-flight requests grows, driving
+the real agent (middleware stack, weather tool, checkpointer) in two ways:
+
+- ``blocking``: ``agent.invoke(...)`` called from the endpoint's event loop,
+  which is what ``async def completions`` did before; sync middleware hooks,
+  the sync tool and the sync HTTP client all run on the loop.
+- ``async``:    ``agent.ainvoke(...)`` as the endpoint does now; async hooks,
+  the async tool and the async HTTP client await their I/O.
+
+Only the edges are stubbed so the numbers reflect how the request path
+schedules work, not Gemini or the network:
+
+- chat models: `BenchChatModel`, with a fixed per-call latency.  The main
+  model calls ``get_weather_forecast`` for the city in the question, then
+  answers with a temperature the grounding rules cannot tie to a day, so the
+  verifier runs too (the verdict cache is disabled).
+- HTTP: ``httpx.MockTransport`` serving a synthetic MET payload (already
+  expired, so every request fetches) with a fixed latency.  Cities come from
+  the bundled gazetteer, so Nominatim and its throttle are not involved.
+
+Usage:
+    python -m benchmarks.concurrency --latency 0.2 --http-latency 0.05 --levels 1 2 4 8 16 32 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, List, Optional
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langgraph.constants import TAG_NOSTREAM
+
+from benchmarks.fixtures import synthetic_met_payload
+
+# Synthetic temperatures span roughly 3-21°C, so this is never a rules FAIL.
+ANSWER = "Expect highs around 15°C, so pack a light jacket."
+EXPIRED = "Thu, 01 Jan 1970 00:00:00 GMT"
+
+
+class BenchChatModel(BaseChatModel):
+    """Chat model stand-in with a fixed per-call latency (blocking in sync calls, awaited in async ones).
+
+    Untagged (the main model): a ``get_weather_forecast`` call for the city
+    after "in" in the question, then `ANSWER` once the tool result is in.
+    Tagged ``nostream`` (verifier, history summary): "PASS".  Structured
+    output (the tool selector) selects ``get_weather_forecast``.
+    """
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        selection = {"tools": ["get_weather_forecast"]}
+
+        def select(_input):
+            time.sleep(self.latency)
+            return selection
+
+        async def aselect(_input):
+            await asyncio.sleep(self.latency)
+            return selection
+
+        return RunnableLambda(select, afunc=aselect)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        if TAG_NOSTREAM in (self.tags or []):
+            message = AIMessage(content="PASS")
+        elif isinstance(messages[-1], ToolMessage):
+            message = AIMessage(content=ANSWER)
+        else:
+            city = str(messages[-1].content).rsplit(" in ", 1)[-1].rstrip("?")
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": "get_weather_forecast", "args": {"city": city}, "id": f"call_{uuid.uuid4().hex[:8]}"}],
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class BlockingAgent:
+    """The real agent behind its sync API, called straight from the event loop."""
+
+    def __init__(self, agent):
+        self._agent = agent
+
+    async def ainvoke(self, payload, config=None, **kwargs):
+        return self._agent.invoke(payload, config=config, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
+
+
+def _install_models(latency: float) -> None:
+    """Make `init_chat_model` build `BenchChatModel`s; must run before `app.agent` is imported.
+
+    `app.agent` and the middleware bind the name with ``from langchain.chat_models
+    import init_chat_model``, so the package attribute (and the defining module,
+    for anything importing it from there) is patched before they load.
+    """
+    import langchain.chat_models
+    import langchain.chat_models.base
+
+    def init_chat_model(model=None, *, tags=None, **_kwargs):
+        return BenchChatModel(latency=latency, tags=tags)
+
+    langchain.chat_models.init_chat_model = init_chat_model
+    langchain.chat_models.base.init_chat_model = init_chat_model
+
+
+def _check_models(agent_module) -> None:
+    """Fail fast if the agent was built with real models (imported before `_install_models`)."""
+    models = {
+        "model": agent_module.model,
+        "tool_selector.model": getattr(agent_module.tool_selector, "model", None),
+        "history_window summary model": agent_module.history_window._get_summary_model(),
+    }
+    real = [name for name, model in models.items() if not isinstance(model, BenchChatModel)]
+    if real:
+        raise SystemExit(f"app.agent was imported before the bench models were installed: {', '.join(real)}")
+
+
+async def _smoke(app, city: str, tag: str) -> None:
+    """One request through the current agent path; fail unless it went selector -> tool -> ANSWER."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        r = await client.post("/completions", json={"thread_id": f"bench-smoke-{tag}", "input": f"What's the weather in {city}?"})
+    r.raise_for_status()
+    body = r.json()
+    selector = [e for e in body["middleware_events"] if e.get("middleware") == "tool_selector"]
+    tool_results = [m for m in body["debug"] if m["type"] == "ToolMessage"]
+    problems = []
+    if not any(e.get("status") == "success" for e in selector):
+        problems.append(f"tool selection did not succeed: {selector}")
+    if not tool_results or not json.loads(tool_results[0]["content"]).get("ok"):
+        problems.append(f"weather tool did not return a forecast: {tool_results[:1]}")
+    if body["choices"][0]["message"]["content"] != ANSWER:
+        problems.append(f"unexpected answer: {body['choices'][0]['message']['content']!r}")
+    if problems:
+        raise SystemExit(f"{tag} smoke request failed: " + "; ".join(problems))
+
+
+def _install_transport(latency: float) -> None:
+    """Point the shared HTTP clients at a mock MET Norway with a fixed response latency."""
+    from app.tools.external import http_client
+
+    body = synthetic_met_payload().encode()
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.host != "api.met.no":
+            return httpx.Response(404, json=[])
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json", "Expires": EXPIRED})
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return respond(request)
+
+    async def ahandler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return respond(request)
+
+    http_client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    http_client._async_client = httpx.AsyncClient(transport=httpx.MockTransport(ahandler))
+
+
+async def _run_level(app, concurrency: int, cities: List[str], tag: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(len(cities)):
+            queue.put_nowait(i)
+
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                r = await client.post(
+                    "/completions",
+                    json={"thread_id": f"bench-{tag}-{concurrency}-{i}", "input": f"What's the weather in {cities[i]}?"},
+                )
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return len(cities) / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated chat model latency per call (s).")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Simulated MET response latency (s).")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--requests-per-level", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROUNDING_CACHE_MAX_ENTRIES", "0")
+    _install_models(args.latency)
+    import app.agent
+    from app.main import app as api
+    from app.tools.external.gazetteer import gazetteer
+
+    _check_models(app.agent)
+    _install_transport(args.http_latency)
+    agent = app.agent.agent
+    cities = [place.display_name for place in gazetteer.top(args.requests_per_level)]
+
+    app.agent.agent = BlockingAgent(agent)
+    await _smoke(api, cities[0], "blocking")
+    app.agent.agent = agent
+    await _smoke(api, cities[0], "async")
+
+    print(
+        f"simulated latency: model {args.latency * 1000:.0f} ms, MET {args.http_latency * 1000:.0f} ms; "
+        f"{len(cities)} requests per level"
+    )
+    print(f"{'in-flight':>10} {'blocking rps':>14} {'async rps':>11} {'speedup':>9}")
+    for level in args.levels:
+        app.agent.agent = BlockingAgent(agent)
+        before = await _run_level(api, level, cities, "blocking")
+        app.agent.agent = agent
+        after = await _run_level(api, level, cities, "async")
+        print(f"{level:>10} {before:>14.1f} {after:>11.1f} {after / before:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
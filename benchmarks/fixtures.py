@@ -0,0 +1,114 @@
+"""MET Norway payload fixtures for the parsing/aggregation benchmarks.
+
+``synthetic_met_payload`` builds a locationforecast/2.0/compact document with
+the real shape: hourly points for ~60 hours, then 6-hourly points out to
+~9.5 days, each with the full set of instant/next_N_hours fields.
+
+Real responses can be recorded (network required) and passed to the
+benchmarks with ``--fixture``:
+
+    python -m benchmarks.fixtures --lat 48.86 --lon 2.35 --out benchmarks/fixtures/paris.json
+"""
+
+import argparse
+import json
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+MET_FORECAST_URL = "https://api.met.no/weatherapi/locationforecast/2.0/compact"
+SYMBOLS = ["clearsky_day", "fair_day", "partlycloudy_day", "cloudy", "lightrain", "rain", "lightrainshowers_day"]
+
+
+def _point(t: datetime, rng: random.Random, hourly: bool) -> dict:
+    temp = 12 + 8 * math.sin((t.hour - 9) / 24 * 2 * math.pi) + rng.uniform(-1.5, 1.5)
+    data = {
+        "instant": {
+            "details": {
+                "air_pressure_at_sea_level": round(rng.uniform(995, 1030), 1),
+                "air_temperature": round(temp, 1),
+                "cloud_area_fraction": round(rng.uniform(0, 100), 1),
+                "relative_humidity": round(rng.uniform(35, 98), 1),
+                "wind_from_direction": round(rng.uniform(0, 360), 1),
+                "wind_speed": round(rng.uniform(0, 14), 1),
+            }
+        },
+        "next_12_hours": {"summary": {"symbol_code": rng.choice(SYMBOLS)}, "details": {}},
+        "next_6_hours": {
+            "summary": {"symbol_code": rng.choice(SYMBOLS)},
+            "details": {"precipitation_amount": round(max(0.0, rng.gauss(0.4, 1.2)), 1)},
+        },
+    }
+    if hourly:
+        data["next_1_hours"] = {
+            "summary": {"symbol_code": rng.choice(SYMBOLS)},
+            "details": {"precipitation_amount": round(max(0.0, rng.gauss(0.1, 0.4)), 1)},
+        }
+    return {"time": t.strftime("%Y-%m-%dT%H:%M:%SZ"), "data": data}
+
+
+def synthetic_met_payload(start: datetime | None = None, seed: int = 0) -> str:
+    """A MET compact response body (JSON text) starting at *start* (default: this hour, UTC)."""
+    rng = random.Random(seed)
+    start = (start or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    timeseries = []
+    t = start
+    for _ in range(61):
+        timeseries.append(_point(t, rng, hourly=True))
+        t += timedelta(hours=1)
+    while t < start + timedelta(days=9, hours=12):
+        t += timedelta(hours=6 - t.hour % 6)
+        timeseries.append(_point(t, rng, hourly=False))
+    doc = {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [2.35, 48.86, 35]},
+        "properties": {
+            "meta": {
+                "updated_at": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "units": {
+                    "air_pressure_at_sea_level": "hPa",
+                    "air_temperature": "celsius",
+                    "cloud_area_fraction": "%",
+                    "precipitation_amount": "mm",
+                    "relative_humidity": "%",
+                    "wind_from_direction": "degrees",
+                    "wind_speed": "m/s",
+                },
+            },
+            "timeseries": timeseries,
+        },
+    }
+    return json.dumps(doc, indent=2)
+
+
+def load_payload(path: str | None) -> str:
+    """A recorded fixture from *path*, or a synthetic payload when no path is given."""
+    if path is None:
+        return synthetic_met_payload()
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main() -> None:
+    import httpx
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lat", type=float, required=True)
+    parser.add_argument("--lon", type=float, required=True)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    r = httpx.get(
+        MET_FORECAST_URL,
+        params={"lat": round(args.lat, 2), "lon": round(args.lon, 2)},
+        headers={"User-Agent": "TravelAssistant/1.0 (benchmark fixture)"},
+        timeout=15.0,
+    )
+    r.raise_for_status()
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(r.text)
+    print(f"recorded {len(r.content)} bytes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
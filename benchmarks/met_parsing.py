@@ -0,0 +1,80 @@
+"""MET Norway response parsing benchmark: ``r.json()`` vs. the streaming parser.
+
+Compares, per forecast call:
+
+- ``full``:      join the body, ``json.loads`` the whole document and pass
+                 its ``properties.timeseries`` to ``_aggregate_timeseries``
+                 (the pre-streaming path, which aggregated ``r.json()``).
+- ``streaming``: decode byte chunks as they arrive and feed them through
+                 ``met_stream.iter_timeseries`` straight into the aggregation,
+                 stopping once the forecast days are covered.
+
+Reports CPU time per call and peak traced memory (``tracemalloc``).  Without
+``--fixture`` a synthetic payload with MET's compact shape is used; record
+real responses with ``python -m benchmarks.fixtures``.
+
+Usage:
+    python -m benchmarks.met_parsing --chunk-size 16384 --fixture benchmarks/fixtures/paris.json
+"""
+
+import argparse
+import codecs
+import json
+import time
+import tracemalloc
+
+from app.tools.external.met_stream import iter_timeseries
+from app.tools.external.weather import STREAM_UTC_DAYS, _aggregate_timeseries
+from benchmarks.fixtures import load_payload
+
+
+def _full(chunks: list[bytes]):
+    return _aggregate_timeseries(json.loads(b"".join(chunks))["properties"]["timeseries"])
+
+
+def _streaming(chunks: list[bytes]):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    return _aggregate_timeseries(iter_timeseries((decoder.decode(c) for c in chunks), STREAM_UTC_DAYS))
+
+
+def _time_per_call(fn, chunks, repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(chunks)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def _peak_kib(fn, chunks) -> float:
+    tracemalloc.start()
+    fn(chunks)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", action="append", help="Recorded MET response (repeatable).")
+    parser.add_argument("--chunk-size", type=int, default=16384, help="Bytes per simulated network read.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    for path in args.fixture or [None]:
+        body = load_payload(path).encode()
+        chunks = [body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size)]
+        assert _full(chunks) == _streaming(chunks), "parsers disagree"
+
+        print(f"fixture: {path or 'synthetic'} ({len(body) / 1024:.0f} KiB, {len(chunks)} chunks)")
+        print(f"{'parser':>10} {'ms/call':>9} {'peak KiB':>9}")
+        for name, fn in (("full", _full), ("streaming", _streaming)):
+            ms = _time_per_call(fn, chunks, args.repeat, args.number)
+            print(f"{name:>10} {ms:>9.3f} {_peak_kib(fn, chunks):>9.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Tool-result token benchmark: full ``model_dump_json()`` vs. the compact encoding.
+
+Tool results stay in the thread, so every later model call in the
+conversation re-reads them (and the grounding check reads them again).  For
+each conversation this replays the turns and counts, per model turn, the
+tokens of all tool results the model is sent, in both formats.
+
+The corpus is JSONL, one conversation per line: either a ``/completions``
+``debug`` trace (``[{"type": ..., "content": ..., "tool_name": ...}, ...]``,
+as returned on the last turn of a thread) or ``{"debug": [...]}``.  Without
+``--corpus`` a synthetic corpus is generated from the synthetic MET payload.
+
+Tokens are counted with ``tiktoken`` (cl100k_base) when it is installed,
+otherwise with a word/punctuation approximation; Gemini's tokenizer differs,
+but the ratio between formats is what matters.
+
+Usage:
+    python -m benchmarks.tool_tokens --corpus conversations.jsonl
+    python -m benchmarks.tool_tokens --conversations 50 --seed 1
+"""
+
+import argparse
+import json
+import random
+import re
+from datetime import datetime, timezone
+
+from app.tools.external.timezones import zone_for
+from app.tools.external.weather import (
+    WeatherForecastBatchResult,
+    WeatherForecastResult,
+    _aggregate_timeseries,
+    _encode,
+)
+from benchmarks.fixtures import synthetic_met_payload
+
+# (query, Nominatim-style display name, lat, lon)
+CITIES = [
+    ("Paris", "Paris, Ile-de-France, Metropolitan France, France", 48.86, 2.35),
+    ("Tokyo", "Tokyo, Japan", 35.68, 139.65),
+    ("Lisbon", "Lisboa, Grande Lisboa, Lisboa, Portugal", 38.72, -9.14),
+    ("New York", "New York, United States", 40.71, -74.01),
+    ("Reykjavik", "Reykjavík, Reykjavíkurborg, Capital Region, Iceland", 64.15, -21.94),
+    ("Cusco", "Cusco, Provincia de Cusco, Cusco, Peru", -13.53, -71.97),
+    ("Cape Town", "Cape Town, City of Cape Town, Western Cape, South Africa", -33.92, 18.42),
+    ("Hanoi", "Hanoi, Vietnam", 21.03, 105.85),
+]
+
+
+def _count_tokens():
+    try:
+        import tiktoken
+    except ImportError:
+        pattern = re.compile(r"\w+|[^\w\s]")
+        return "approx", lambda text: len(pattern.findall(text))
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return "cl100k_base", lambda text: len(encoding.encode(text))
+
+
+def _forecast(rng: random.Random, city: tuple) -> WeatherForecastResult:
+    query, place, lat, lon = city
+    if rng.random() < 0.1:
+        return WeatherForecastResult(ok=False, query=query, error=f"Could not geocode '{query}'.")
+    payload = json.loads(synthetic_met_payload(datetime.now(timezone.utc), seed=rng.randrange(1 << 30)))
+    zone = zone_for(lat, lon)
+    return WeatherForecastResult(
+        ok=True,
+        query=query,
+        place=place,
+        lat=lat,
+        lon=lon,
+        timezone=zone.name,
+        days=_aggregate_timeseries(payload["properties"]["timeseries"], zone.tzinfo),
+    )
+
+
+def synthetic_corpus(conversations: int, seed: int) -> list[list[dict]]:
+    """Debug traces of multi-turn planning chats; most turns call one weather tool."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(conversations):
+        trace = []
+        for turn in range(rng.randint(3, 6)):
+            trace.append({"type": "HumanMessage", "content": f"turn {turn} question"})
+            roll = rng.random()
+            if roll < 0.5:
+                result = _forecast(rng, rng.choice(CITIES))
+                trace.append({"type": "ToolMessage", "tool_name": "get_weather_forecast", "content": result.model_dump_json()})
+            elif roll < 0.7:
+                batch = WeatherForecastBatchResult(results=[_forecast(rng, c) for c in rng.sample(CITIES, 3)])
+                trace.append({"type": "ToolMessage", "tool_name": "get_weather_forecasts", "content": batch.model_dump_json()})
+            trace.append({"type": "AIMessage", "content": "answer " * 120})
+        corpus.append(trace)
+    return corpus
+
+
+def load_corpus(path: str) -> list[list[dict]]:
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    return [line["debug"] if isinstance(line, dict) else line for line in lines]
+
+
+def _reencode(entry: dict) -> str | None:
+    """The compact encoding of a recorded tool result, or None if it is not a weather result."""
+    model = {"get_weather_forecast": WeatherForecastResult, "get_weather_forecasts": WeatherForecastBatchResult}
+    cls = model.get(entry.get("tool_name"))
+    if cls is None:
+        return None
+    try:
+        return _encode(cls.model_validate_json(entry["content"]), "compact")
+    except ValueError:
+        return None
+
+
+def replay(trace: list[dict], count) -> list[tuple[int, int]]:
+    """Per user turn: tool-result tokens the model reads, as (json, compact).
+
+    A turn's model calls see every earlier result plus the ones produced in
+    the turn itself.
+    """
+    turns = []
+    full = compact = 0
+    for entry in trace:
+        if entry.get("type") == "HumanMessage":
+            turns.append([full, compact])
+        elif entry.get("type") == "ToolMessage":
+            encoded = _reencode(entry)
+            tokens = count(entry["content"])
+            compact_tokens = count(encoded) if encoded is not None else tokens
+            full += tokens
+            compact += compact_tokens
+            if turns:
+                turns[-1][0] += tokens
+                turns[-1][1] += compact_tokens
+    return [tuple(t) for t in turns]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL of recorded debug traces.")
+    parser.add_argument("--conversations", type=int, default=30, help="Synthetic conversations (no --corpus).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer, count = _count_tokens()
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.conversations, args.seed)
+    turns = [turn for trace in corpus for turn in replay(trace, count)]
+    full = sum(t[0] for t in turns)
+    compact = sum(t[1] for t in turns)
+
+    print(f"corpus: {args.corpus or 'synthetic'} ({len(corpus)} conversations, {len(turns)} turns, tokenizer {tokenizer})")
+    print(f"{'format':>8} {'tokens/turn':>12} {'total':>9}")
+    print(f"{'json':>8} {full / max(1, len(turns)):>12.0f} {full:>9}")
+    print(f"{'compact':>8} {compact / max(1, len(turns)):>12.0f} {compact:>9}")
+    if full:
+        print(f"reduction: {100 * (1 - compact / full):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Build ``app/tools/external/data/gazetteer.tsv`` from a GeoNames dump.
+
+The bundled file is a curated list of major travel destinations.  To ship a
+larger index (e.g. the top 50k places), download from
+https://download.geonames.org/export/dump/:
+
+- ``cities15000.zip`` (or ``cities5000.zip`` / ``cities1000.zip``), unzipped
+- ``countryInfo.txt``
+
+and run:
+
+    python scripts/build_gazetteer.py cities15000.txt countryInfo.txt --limit 50000
+
+GeoNames data is licensed CC BY 4.0.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+OUTPUT = os.path.join(os.path.dirname(__file__), "..", "app", "tools", "external", "data", "gazetteer.tsv")
+HEADER = ["name", "aliases", "country_code", "country", "lat", "lon", "population", "timezone"]
+
+# GeoNames "alternatenames" lists every language; keep a few short Latin-script
+# ones so common spellings ("Koeln", "Bombay") resolve without bloating the file.
+MAX_ALIASES = 6
+MAX_ALIAS_LENGTH = 40
+
+
+def _load_countries(path: str) -> dict[str, str]:
+    countries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            countries[cols[0]] = cols[4]
+    return countries
+
+
+def _aliases(name: str, asciiname: str, alternates: str) -> list[str]:
+    seen = {name.casefold()}
+    aliases = []
+    for alias in [asciiname, *alternates.split(",")]:
+        alias = alias.strip()
+        if (
+            not alias
+            or alias.casefold() in seen
+            or len(alias) > MAX_ALIAS_LENGTH
+            or not all(ch.isascii() or ch.isalpha() and ord(ch) < 0x250 for ch in alias)
+        ):
+            continue
+        seen.add(alias.casefold())
+        aliases.append(alias)
+        if len(aliases) == MAX_ALIASES:
+            break
+    return aliases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cities", help="GeoNames citiesNNNN.txt")
+    parser.add_argument("country_info", help="GeoNames countryInfo.txt")
+    parser.add_argument("--limit", type=int, default=50000, help="Keep the N most populous places.")
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+
+    countries = _load_countries(args.country_info)
+    rows = []
+    with open(args.cities, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            name, asciiname, alternates = cols[1], cols[2], cols[3]
+            lat, lon, cc, population, tz = cols[4], cols[5], cols[8], int(cols[14] or 0), cols[17]
+            if cc not in countries or not tz:
+                continue
+            aliases = ";".join(_aliases(name, asciiname, alternates))
+            rows.append([name, aliases, cc, countries[cc], lat, lon, population, tz])
+
+    rows.sort(key=lambda r: -r[6])
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(HEADER)
+        writer.writerows(rows[: args.limit])
+    print(f"wrote {min(len(rows), args.limit)} places to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 import uuid
 
@@ -66,13 +67,25 @@ _MIDDLEWARE_STATUS_ICONS = {
     "recovered": ":warning:",
     "retrying": ":repeat:",
     "failed": ":x:",
+    "timeout": ":hourglass:",
     "error": ":exclamation:",
+    "hit": ":zap:",
+    "revalidated": ":zap:",
+    "miss": ":globe_with_meridians:",
+    "ambiguous": ":globe_with_meridians:",
+    "unknown": ":globe_with_meridians:",
+    "coalesced": ":link:",
 }
 
 _MIDDLEWARE_LABELS = {
     "retry_model": "Model Retry",
     "retry_tool": "Tool Retry",
     "hallucination_guardrail": "Hallucination Guardrail",
+    "history_window": "History Window",
+    "forecast_cache": "Forecast Cache",
+    "geocode_cache": "Geocode Cache",
+    "gazetteer": "Gazetteer",
+    "singleflight": "Request Coalescing",
 }
 
 
@@ -128,6 +141,23 @@ def render_debug(debug_trace, middleware_events=None):
                     st.markdown(f"**{msg_type}:** {step.get('content', '')}")
 
 
+# ── Streaming ────────────────────────────────────────────────────────────────
+
+
+def _iter_sse(resp):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data_lines = None, []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line == "":
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event, data_lines = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip())
+
+
 # ── Chat history ─────────────────────────────────────────────────────────────
 
 for msg in st.session_state.messages:
@@ -146,31 +176,51 @@ if prompt := st.chat_input("Ask me anything about travel…"):
     with st.chat_message("assistant"):
         debug_trace = None
         middleware_events = None
-        with st.spinner("Thinking…"):
-            try:
-                resp = requests.post(
-                    f"{API_BASE_URL}/completions",
-                    json={
-                        "thread_id": st.session_state.thread_id,
-                        "input": prompt,
-                    },
-                    timeout=60,
-                )
+        placeholder = st.empty()
+        placeholder.markdown("_Thinking…_")
+        reply = ""
+        try:
+            with requests.post(
+                f"{API_BASE_URL}/completions",
+                json={
+                    "thread_id": st.session_state.thread_id,
+                    "input": prompt,
+                    "stream": True,
+                },
+                stream=True,
+                timeout=60,
+            ) as resp:
                 resp.raise_for_status()
-                data = resp.json()
-                reply = data["choices"][0]["message"]["content"]
-                debug_trace = data.get("debug")
-                middleware_events = data.get("middleware_events")
-            except requests.exceptions.ConnectionError:
-                reply = "Could not reach the server. Is the API running?"
-            except requests.exceptions.Timeout:
-                reply = "The request timed out. Please try again."
-            except requests.exceptions.HTTPError as e:
-                reply = f"Server error ({e.response.status_code}). Please try again later."
-            except Exception as e:
-                reply = f"Something went wrong: {e}"
-
-        st.markdown(reply)
+                for event, data in _iter_sse(resp):
+                    if data == "[DONE]":
+                        break
+                    payload = json.loads(data)
+                    if event is None:
+                        choice = payload["choices"][0]
+                        delta = choice["delta"].get("content")
+                        if delta:
+                            reply += delta
+                            placeholder.markdown(reply + "▌")
+                        if choice.get("finish_reason"):
+                            placeholder.markdown(reply)
+                    elif event == "retract":
+                        reply = ""
+                        placeholder.markdown("_Revising…_")
+                    elif event == "debug":
+                        debug_trace = payload.get("debug")
+                        middleware_events = payload.get("middleware_events")
+                    elif event == "error":
+                        reply = payload.get("error", "Something went wrong. Please try again later.")
+        except requests.exceptions.ConnectionError:
+            reply = "Could not reach the server. Is the API running?"
+        except requests.exceptions.Timeout:
+            reply = "The request timed out. Please try again."
+        except requests.exceptions.HTTPError as e:
+            reply = f"Server error ({e.response.status_code}). Please try again later."
+        except Exception as e:
+            reply = f"Something went wrong: {e}"
+
+        placeholder.markdown(reply)
         if show_debug and debug_trace:
             render_debug(debug_trace, middleware_events)
 